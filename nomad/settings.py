@@ -15,7 +15,7 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 
 DEBUG = bool(os.getenv("DEBUG", default=0))
 
-ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS").split()
+ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split()
 
 # Application definition
 
@@ -27,10 +27,10 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "ckeditor",
     "ckeditor_uploader",
-    "debug_toolbar",
     "drf_yasg",
     "rest_framework",
     "src.tours",
@@ -38,22 +38,43 @@ INSTALLED_APPS = [
     "src.car_rent",
     "src.lead",
     "src.main",
+    "src.media",
+    "src.tg_bot",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "src.base.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "src.base.metrics.MetricsMiddleware",
+    "src.base.timing.ServerTimingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
-ROOT_URLCONF = "nomad.urls"
+# Off unless asked for: its sync-only middleware would push every async view
+# back onto a thread under ASGI. When on, it only renders for staff.
+DEBUG_TOOLBAR = bool(os.getenv("DEBUG_TOOLBAR", default=DEBUG))
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
+# Share of anonymous requests timed into Server-Timing and the request log
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "0.05"))
+
+# Every process writes its counters here; /api/metrics/ sums them for Prometheus
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(BASE_DIR, "metrics"))
+METRICS_FLUSH_INTERVAL = 5
+# Files of exited workers are folded into METRICS_DIR/retired.json after this long
+METRICS_RETENTION = 60 * 60 * 24
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+ROOT_URLCONF = os.environ.get("ROOT_URLCONF", "nomad.urls")
 
 TEMPLATES = [
     {
@@ -87,6 +108,32 @@ DATABASES = {
     }
 }
 
+# DB_ENGINE=sqlite runs the app (and its test suite) without a Postgres server
+if os.environ.get("DB_ENGINE") == "sqlite":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("DATABASE") or os.path.join(BASE_DIR, "db.sqlite3"),
+    }
+
+# View cache versions and catalog snapshots are stored without expiry, so the
+# backend must not cull them: Redis when REDIS_URL is set (shared by all
+# workers), otherwise a file cache sized well above the number of entries
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+            "LOCATION": os.environ.get("CACHE_LOCATION", os.path.join(BASE_DIR, "cache")),
+            "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 20000))},
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -130,20 +177,42 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
+# Encoded thumbnails served by the compressed-*-image endpoints
+IMAGE_CACHE_ROOT = os.path.join(MEDIA_ROOT, "cache")
+
+# Hand media and thumbnails to nginx's internal location (nginx/default.conf)
+# with X-Accel-Redirect instead of streaming them from a worker
+MEDIA_ACCEL_REDIRECT = bool(os.getenv("MEDIA_ACCEL_REDIRECT"))
+MEDIA_ACCEL_PREFIX = "/internal/media/"
+
+# Responsive widths generated on upload for every ResizedImageField
+IMAGE_DERIVATIVE_WIDTHS = [320, 640, 1024, 1600]
+IMAGE_DERIVATIVE_QUALITY = 50
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Tour/article page views are buffered per worker and flushed in batches
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+VIEW_COUNTER_MAX_PENDING = 500
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.TokenAuthentication",
-    ]
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "src.base.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # The browsable API is only negotiated for staff
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS": "src.base.renderers.StaffContentNegotiation",
 }
 
 
-CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS").split()
+CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "").split()
 
 CSRF_TRUSTED_ORIGINS = [
     "https://nomadslife.travel",
@@ -243,14 +312,20 @@ CKEDITOR_UPLOAD_PATH = "uploads/"
 
 
 # Django debug toolbar
-# def show_toolbar(request):
-#     return True
-
+DEBUG_TOOLBAR_CONFIG = {
+    "SHOW_TOOLBAR_CALLBACK": "src.base.timing.show_toolbar",
+}
 
-# DEBUG_TOOLBAR_CONFIG = {
-#     "SHOW_TOOLBAR_CALLBACK": show_toolbar,
-#     "INTERCEPT_REDIRECTS": False,
-# }
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "src.base.timing": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
 
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -0,0 +1,21 @@
+"""
+Settings for the test suite: ``python manage.py test --settings=nomad.settings_test``.
+
+Runs without a ``.env`` and keeps the per-request timing log and Django's
+4xx warnings out of the test output.
+"""
+from .settings import *  # noqa: F401,F403
+
+SECRET_KEY = SECRET_KEY or "nomad-test-secret-key"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "null": {"class": "logging.NullHandler"},
+    },
+    "loggers": {
+        "src.base.timing": {"handlers": ["null"], "propagate": False},
+        "django.request": {"handlers": ["null"], "propagate": False},
+    },
+}
@@ -1,8 +1,9 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from src.base.views import media, metrics
 from .yasg import urlpatterns as doc_urlpatterns
 
 urlpatterns = [
@@ -13,10 +14,16 @@ urlpatterns = [
     path("api/", include("src.main.urls")),
     path("api/", include("src.car_rent.urls")),
     path("api/lead/", include("src.lead.urls")),
-    path("__debug__/", include("debug_toolbar.urls")),
+    path("api/metrics/", metrics, name="metrics"),
 ]
 
+if settings.DEBUG_TOOLBAR:
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
+
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.MEDIA_ACCEL_REDIRECT:
+    urlpatterns.append(re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", media))
+else:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 urlpatterns += doc_urlpatterns
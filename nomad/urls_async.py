@@ -0,0 +1,15 @@
+from django.urls import path
+
+from src.main import async_views as main_views
+from src.tours import async_views as tours_views
+from .urls import urlpatterns as sync_urlpatterns
+
+# Served by nomad/asgi.py: the hot read endpoints resolve to their async
+# variants first, everything else falls through to the regular URLconf
+urlpatterns = [
+    path("api/<str:lang_code>/tour/main", tours_views.main_page, name="main"),
+    path("api/<str:lang_code>/tour/guaranteed", tours_views.guaranteed_tours, name="guaranteed-tours-list"),
+    path("api/<str:lang_code>/tour/categories", tours_views.categories, name="categories"),
+    path("api/tour/detail/<str:slug>", tours_views.tour_detail, name="tour-detail"),
+    path("api/article/detail/<str:slug>", main_views.article_detail, name="article-detail"),
+] + sync_urlpatterns
@@ -2,6 +2,7 @@ from typing import Any
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin, Group
 from django.http.request import HttpRequest
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from .models import User, SendMail
 
@@ -32,6 +33,12 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(SendMail)
 class SendMailAdmin(admin.ModelAdmin):
-    list_display = ("id", "to")
-    list_display = ("id", "to")
+    list_display = ("id", "to", "status", "attempts", "sent_at", "send_duration_ms")
+    list_filter = ("status",)
+    readonly_fields = ("status", "attempts", "next_attempt_at", "sent_at", "send_duration_ms", "last_error")
+    actions = ["requeue"]
+
+    @admin.action(description="Отправить повторно")
+    def requeue(self, request, queryset):
+        queryset.exclude(status=2).update(status=1, attempts=0, next_attempt_at=timezone.now())
     
\ No newline at end of file
@@ -0,0 +1,84 @@
+import logging
+import smtplib
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from src.account.models import SendMail
+from src.base.outbox import claim, mark_failed, mark_sent
+from src.base.retry import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+def is_transient(error):
+    """4xx replies (greylisting, rate limits) and dropped connections are worth retrying; 5xx are not."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+
+class Command(BaseCommand):
+    help = "Send queued SendMail messages over one long-lived SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to sleep on an empty queue")
+        parser.add_argument("--max-attempts", type=int, default=8)
+        parser.add_argument("--lease", type=int, default=300, help="Seconds a claimed batch stays hidden from other workers")
+        parser.add_argument("--rate", type=float, default=2.0, help="Maximum messages per second")
+        parser.add_argument("--idle-timeout", type=float, default=30.0, help="Close the SMTP connection after this many idle seconds")
+
+    def handle(self, *args, **options):
+        self.connection = get_connection(fail_silently=False)
+        self.interval = 1 / options["rate"] if options["rate"] > 0 else 0
+        self.last_send = 0.0
+        idle_since = time.monotonic()
+        try:
+            while True:
+                close_old_connections()
+                mails = claim(SendMail, options["batch_size"], options["lease"])
+                if not mails:
+                    if options["once"]:
+                        break
+                    # Servers drop idle sessions anyway; don't hold one open between bursts
+                    if self.connection.connection and time.monotonic() - idle_since > options["idle_timeout"]:
+                        self.connection.close()
+                    time.sleep(options["poll_interval"])
+                    continue
+                for mail in mails:
+                    self.send(mail, options["max_attempts"])
+                idle_since = time.monotonic()
+        finally:
+            self.connection.close()
+
+    def send(self, mail, max_attempts):
+        wait = self.last_send + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_send = time.monotonic()
+
+        started = time.perf_counter()
+        try:
+            # open() is a no-op while the session is still up
+            self.connection.open()
+            self.connection.send_messages([mail.build_message(self.connection)])
+        except Exception as e:
+            if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                # The session is in an unknown state, start a fresh one next time
+                self.connection.close()
+            if is_transient(e):
+                logger.warning("Mail %s to %s deferred: %s", mail.pk, mail.to, e)
+                mark_failed(mail, e, backoff_delay(mail.attempts + 1, base=30), max_attempts)
+            else:
+                logger.error("Mail %s to %s rejected: %s", mail.pk, mail.to, e)
+                mark_failed(mail, e, None, max_attempts)
+        else:
+            duration = time.perf_counter() - started
+            mark_sent(mail, duration)
+            self.stdout.write(f"Sent mail {mail.pk} to {mail.to} in {duration * 1000:.0f} ms")
@@ -1,10 +1,9 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.utils.translation import gettext as _
 from ckeditor.fields import RichTextField
-from django.core.mail import send_mail, EmailMessage
-from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.core.mail import EmailMessage
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.safestring import mark_safe
@@ -21,34 +20,40 @@ class User(AbstractUser):
 
 
 class SendMail(models.Model):
+    STATUS_CHOICES = (
+        (1, "В очереди"),
+        (2, "Отправлено"),
+        (3, "Ошибка"),
+    )
+
     to = models.EmailField(_("К"))
     subject = models.CharField(_("Subject"), max_length=255)
     body = RichTextField(_("body"))
     created_at = models.DateTimeField(_("Дата и время отправки"), auto_now_add=True, null=True, blank=True)
 
+    # Delivered by the send_queued_mail worker; NULL for mail sent before the queue existed
+    status = models.IntegerField(_("Статус"), choices=STATUS_CHOICES, null=True, blank=True)
+    attempts = models.IntegerField(_("Попыток"), default=0)
+    last_error = models.TextField(_("Последняя ошибка"), blank=True, default="")
+    next_attempt_at = models.DateTimeField(_("Следующая попытка"), default=timezone.now)
+    sent_at = models.DateTimeField(_("Дата отправки"), null=True, blank=True)
+    send_duration_ms = models.IntegerField(_("Время отправки (мс)"), null=True, blank=True)
+
     class Meta:
         verbose_name = _("Письмо")
         verbose_name_plural = _("Написать письмо")
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
 
     def __str__(self) -> str:
         return str(self.to)
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.status is None:
+            self.status = 1
+        return super().save(*args, **kwargs)
 
-# Function to send the email
-def send_email_on_creation(sender, instance, **kwargs):
-    to_email = instance.to
-    subject = instance.subject
-    body = mark_safe(instance.body)
-    
-    message = render_to_string('index.html', {'subject': subject, 'body': body})
-    
-    email = EmailMessage(subject, message, settings.EMAIL_HOST_USER, [to_email])
-    email.content_subtype = "html" 
-    email.send()
-
-
-# Signal to send email when a new SendMail object is created
-@receiver(post_save, sender=SendMail)
-def send_email_on_create(sender, instance, created, **kwargs):
-    if created:
-        send_email_on_creation(sender, instance, **kwargs)
+    def build_message(self, connection=None):
+        message = render_to_string("index.html", {"subject": self.subject, "body": mark_safe(self.body)})
+        email = EmailMessage(self.subject, message, settings.EMAIL_HOST_USER, [self.to], connection=connection)
+        email.content_subtype = "html"
+        return email
@@ -1,3 +1,51 @@
-from django.test import TestCase
+import smtplib
+from contextlib import nullcontext
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from src.base.outbox import FAILED, QUEUED, SENT
+from src.base.testing import EndpointTestMixin
+from .models import SendMail
+
+
+# close_old_connections() in the worker loop drops a connection held inside a test transaction
+class SendQueuedMailTests(EndpointTestMixin, TransactionTestCase):
+    def queue(self, to):
+        return SendMail.objects.create(to=to, subject="Hello", body="<p>Body</p>")
+
+    def send(self, error=None):
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=error) if error else nullcontext():
+            call_command("send_queued_mail", "--once", "--rate=0", stdout=StringIO())
+
+    def test_sends_queue(self):
+        self.queue("first@example.com")
+        self.queue("second@example.com")
+        self.send()
+        self.assertEqual([message.to for message in mail.outbox], [["first@example.com"], ["second@example.com"]])
+        self.assertEqual(mail.outbox[0].content_subtype, "html")
+        self.assertEqual(set(SendMail.objects.values_list("status", "attempts")), {(SENT, 1)})
+        self.assertTrue(all(SendMail.objects.values_list("sent_at", flat=True)))
+
+    def test_transient_error_is_retried_later(self):
+        queued = self.queue("greylisted@example.com")
+        with self.assertLogs("src.account.management.commands.send_queued_mail", "WARNING"):
+            self.send(smtplib.SMTPResponseException(451, b"Try again later"))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (QUEUED, 1))
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+        self.assertIn("Try again later", queued.last_error)
+
+    def test_refused_recipient_gives_up(self):
+        queued = self.queue("nobody@example.com")
+        refused = smtplib.SMTPRecipientsRefused({"nobody@example.com": (550, b"No such user")})
+        with self.assertLogs("src.account.management.commands.send_queued_mail", "ERROR"):
+            self.send(refused)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (FAILED, 1))
+        self.assertEqual(mail.outbox, [])
@@ -0,0 +1,85 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.request import Request
+
+from .cache import LANGS, get_cache_key, get_cached_response, set_cached_response
+from .conditional import get_validator_headers, set_validator_headers
+from .renderers import ORJSONRenderer
+
+
+def _in_own_connection(func):
+    def call(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+    return call
+
+
+async def run_sync(func, *args, **kwargs):
+    """Run blocking ORM/serializer code on the request's thread and DB connection."""
+    return await sync_to_async(func)(*args, **kwargs)
+
+
+async def gather_sync(*funcs):
+    """
+    Run independent blocking calls at the same time, each in a thread of its own.
+
+    Every call opens its own DB connection and closes it when done (the same
+    lifetime a sync request has with ``CONN_MAX_AGE = 0``), so this only pays
+    off for work that takes noticeably longer than a connect.
+    """
+    return await asyncio.gather(
+        *(sync_to_async(_in_own_connection(func), thread_sensitive=False)() for func in funcs)
+    )
+
+
+def render_json(data, status=200):
+    return HttpResponse(ORJSONRenderer().render(data), status=status, content_type="application/json")
+
+
+async def cached(view_class, request, lang, build, timeout=None):
+    """Cache ``build()`` under ``view_class``'s name so the same signals evict it."""
+    if lang not in LANGS:
+        return await build()
+    name = view_class.__name__
+    key = await sync_to_async(get_cache_key)(name, lang, request, view_class.cache_query_params, "async")
+    response = await sync_to_async(get_cached_response)(name, key)
+    if response is None:
+        response = await build()
+        await sync_to_async(set_cached_response)(key, response, timeout or view_class.cache_timeout)
+    return response
+
+
+async def conditional(view_class, request, kwargs, build, view=None):
+    """
+    ``build()``, or a 304 when the ``ConditionalGetMixin`` validator of ``view_class`` still matches.
+
+    The validator query runs off the event loop before anything is
+    serialized; responses get the same ETag and Last-Modified as the sync
+    view sends for JSON. Pass the ``view`` that ``build()`` goes on to use
+    to let it reuse the page the validator fetched.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return await build()
+
+    if view is None:
+        view = view_class(request=Request(request), kwargs=kwargs, format_kwarg=None)
+    validator = await run_sync(view.get_validator)
+    if not validator["count"]:
+        return await build()
+
+    etag, last_modified = get_validator_headers(validator, ORJSONRenderer.format)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        await run_sync(view.not_modified, validator)
+    else:
+        response = await build()
+        if response.status_code != 200:
+            return response
+    return set_validator_headers(response, etag, last_modified)
@@ -0,0 +1,169 @@
+import hashlib
+import uuid
+from collections import defaultdict
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.http import HttpResponse
+from django.utils.http import urlencode
+
+from .compression import precompress
+from .metrics import registry
+from .timing import record_cache
+
+LANGS = ("ru", "en", "de", "fr", "es", "jp")
+
+_dependents = defaultdict(set)
+
+
+def _version_key(name, lang):
+    return f"viewcache:{name}:{lang}:version"
+
+
+def invalidate(name, langs):
+    cache.set_many({_version_key(name, lang): uuid.uuid4().hex for lang in langs}, None)
+
+
+def _related_objects(instance):
+    for field in instance._meta.concrete_fields:
+        if field.many_to_one:
+            yield field.name
+    for field in instance._meta.private_fields:
+        if isinstance(field, GenericForeignKey):
+            yield field.name
+
+
+def affected_langs(instance):
+    lang = getattr(instance, "lang", None)
+    if not lang:
+        for name in _related_objects(instance):
+            try:
+                lang = getattr(getattr(instance, name), "lang", None)
+            except ObjectDoesNotExist:
+                continue
+            if lang:
+                break
+    langs = {lang} if lang else set(LANGS)
+    old_lang = getattr(instance, "_viewcache_old_lang", None)
+    if old_lang:
+        langs.add(old_lang)
+    return langs
+
+
+def _remember_lang(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._viewcache_old_lang = (
+            sender.objects.filter(pk=instance.pk).values_list("lang", flat=True).first()
+        )
+
+
+def _evict(sender, instance, **kwargs):
+    langs = affected_langs(instance)
+    names = tuple(_dependents[sender])
+
+    def rotate():
+        for name in names:
+            invalidate(name, langs)
+
+    # After commit: a request reading meanwhile would otherwise store the old rows under the new version
+    transaction.on_commit(rotate)
+
+
+def track_lang(model):
+    """Let ``affected_langs`` see the language a ``model`` row had before it was moved to another one."""
+    if any(field.name == "lang" for field in model._meta.concrete_fields):
+        pre_save.connect(_remember_lang, sender=model, dispatch_uid=f"viewcache:{model._meta.label}")
+
+
+def register(name, models):
+    for model in models:
+        _dependents[model].add(name)
+        uid = f"viewcache:{model._meta.label}"
+        post_save.connect(_evict, sender=model, dispatch_uid=uid)
+        post_delete.connect(_evict, sender=model, dispatch_uid=uid)
+        track_lang(model)
+
+
+def representation(request):
+    """The one thing of ``Accept`` and ``?format=`` that changes the body: JSON, unless HTML or a format is asked for."""
+    if request.GET.get("format"):
+        return request.GET["format"]
+    return "html" if "text/html" in request.headers.get("Accept", "") else "json"
+
+
+def get_cache_key(name, lang, request, query_params=(), variant=""):
+    version_key = _version_key(name, lang)
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(version_key, version, None)
+
+    # Only parameters the view reads: arbitrary query strings must not be able to flood the cache
+    params = urlencode(sorted((param, value) for param in query_params for value in request.GET.getlist(param)))
+    variant = f"{request.path}|{params}|{representation(request)}|{variant}"
+    return f"viewcache:{name}:{version}:{hashlib.md5(variant.encode()).hexdigest()}"
+
+
+def get_cached_response(name, key):
+    cached = cache.get(key)
+    record_cache(cached is not None)
+    registry.inc("view_cache_requests_total", {"view": name, "result": "miss" if cached is None else "hit"})
+    if cached is None:
+        return None
+
+    response = HttpResponse(cached["content"], content_type=cached["content_type"])
+    response.encoded_variants = cached.get("encoded")
+    response["Vary"] = "Accept"
+    response["X-Cache"] = "HIT"
+    return response
+
+
+def set_cached_response(key, response, timeout):
+    # The browsable API is staff-only, so its pages must not be handed to anyone else
+    if response.status_code == 200 and not response["Content-Type"].startswith("text/html"):
+        response.encoded_variants = precompress(response.content)
+        cache.set(
+            key,
+            {"content": response.content, "content_type": response["Content-Type"], "encoded": response.encoded_variants},
+            timeout,
+        )
+    response["X-Cache"] = "MISS"
+
+
+class CachedViewMixin:
+    """
+    Caches rendered GET responses per ``lang_code`` until a dependency changes.
+
+    Views list the models they read in ``cache_dependencies``; saving or
+    deleting any of them rotates the cache version of the affected languages
+    only, once the change is committed, which makes every stored variant of
+    that view/language unreachable. Variants are keyed by the
+    ``cache_query_params`` the view reads and by JSON vs HTML; other query
+    parameters and Accept details share one entry.
+    """
+
+    cache_dependencies = ()
+    cache_query_params = ()
+    cache_timeout = 60 * 60 * 24
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_dependencies:
+            register(cls.__name__, cls.cache_dependencies)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != "GET" or kwargs.get("lang_code") not in LANGS:
+            return super().dispatch(request, *args, **kwargs)
+
+        name = type(self).__name__
+        key = get_cache_key(name, kwargs["lang_code"], request, self.cache_query_params)
+        response = get_cached_response(name, key)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            set_cached_response(key, response, self.cache_timeout)
+        return response
@@ -0,0 +1,157 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from src.car_rent.models import Brand, Car, CarRentalRequest, CarType
+from src.car_rent.models import Images as CarImages
+from src.car_rent.models import Prices as CarPrices
+from src.main.models import (
+    FAQ,
+    Accommodation,
+    Answer,
+    ArticleCats,
+    ArticleImages,
+    Articles,
+    Categories,
+    CreateOwnTourRec,
+    Gallery,
+    GalleryImages,
+    Meals,
+    SiteReviews,
+    Transport,
+)
+from src.tours.models import Category, Images, Prices, Route, Slider, Tour, TourReviews
+
+LANGS = ("ru", "en", "de", "fr", "es", "jp")
+
+PARAGRAPH = (
+    "<p>Horse trek across the high pastures, nights in yurt camps and a day at the lake. "
+    "Transfers, meals and a local guide are arranged for the whole route.</p>"
+)
+
+
+def image_file(name, size=(64, 48)):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new("RGB", size, (120, 140, 160)).save(buffer, "JPEG")
+    return SimpleUploadedFile(f"{name}.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+def seed_catalog(
+    langs=LANGS,
+    categories=2,
+    tours=3,
+    prices=3,
+    images=2,
+    routes=3,
+    reviews=3,
+    articles=3,
+    cars=3,
+    paragraphs=3,
+):
+    """
+    Fill the database with a catalog in every language of ``langs``, through the real models.
+
+    Saves run the same signals as the admin (image derivatives, review
+    aggregates, search vectors), so what the API reads matches production
+    rows. Pass ``images=0`` to skip the image pipeline on large catalogs.
+    """
+    today = date.today()
+    text = PARAGRAPH * paragraphs
+    brand, _ = Brand.objects.get_or_create(name="Toyota")
+
+    for lang in langs:
+        for c in range(categories):
+            category = Category.objects.create(
+                lang=lang,
+                name=f"Category {c} {lang}",
+                slug=f"category-{c}-{lang}",
+                img=image_file(f"category-{c}-{lang}") if images else None,
+                alt=f"Category {c}",
+            )
+            for t in range(tours):
+                tour = Tour.objects.create(
+                    lang=lang,
+                    title=f"Tour {c}-{t} {lang}",
+                    slug=f"tour-{c}-{t}-{lang}",
+                    cat=category,
+                    type=1 if t % 2 == 0 else 2,
+                    top=t == 0,
+                    duration=routes,
+                    price_for=1,
+                    description=text,
+                    short_desc=PARAGRAPH,
+                    included=text,
+                    excluded=text,
+                )
+                Prices.objects.bulk_create(
+                    Prices(
+                        tour=tour,
+                        price=500 + 100 * p,
+                        start=today + timedelta(days=30 * (p + 1)),
+                        end=today + timedelta(days=30 * (p + 1) + routes),
+                        deadline=today + timedelta(days=30 * p + 20),
+                    )
+                    for p in range(prices)
+                )
+                Route.objects.bulk_create(
+                    Route(tour=tour, day=d + 1, start="Bishkek", finish="Karakol", description=PARAGRAPH)
+                    for d in range(routes)
+                )
+                for i in range(images):
+                    Images.objects.create(tour=tour, img=image_file(f"tour-{c}-{t}-{i}-{lang}"), alt=f"Tour image {i}")
+                for r in range(reviews):
+                    TourReviews.objects.create(
+                        tour=tour, status=1, rating=Decimal(4 + r % 2), name=f"Guest {r}", comment=PARAGRAPH
+                    )
+
+        Slider.objects.create(
+            lang=lang, title=f"Slide {lang}", img=image_file(f"slide-{lang}") if images else None, is_active=True
+        )
+
+        faq = FAQ.objects.create(lang=lang, name=f"FAQ {lang}")
+        Answer.objects.bulk_create(Answer(faq=faq, question=f"Question {q}?", answer=PARAGRAPH) for q in range(3))
+
+        rec, created = CreateOwnTourRec.objects.get_or_create(lang=lang)
+        if created:
+            for model in (Accommodation, Meals, Transport, Categories):
+                model.objects.bulk_create(model(rec=rec, name=f"{model.__name__} {n}") for n in range(3))
+
+        article_cat = ArticleCats.objects.create(lang=lang, name=f"Articles {lang}", slug=f"articles-{lang}")
+        for a in range(articles):
+            article = Articles.objects.create(
+                lang=lang,
+                cat=article_cat,
+                title=f"Article {a} {lang}",
+                slug=f"article-{a}-{lang}",
+                short_desc=PARAGRAPH,
+                full_desc=text,
+                poster=image_file(f"article-{a}-{lang}") if images else None,
+            )
+            for i in range(images):
+                ArticleImages.objects.create(article=article, img=image_file(f"article-{a}-{i}-{lang}"))
+
+        gallery = Gallery.objects.create(lang=lang, name=f"Gallery {lang}")
+        for i in range(images):
+            GalleryImages.objects.create(gallery=gallery, img=image_file(f"gallery-{i}-{lang}"))
+
+        car_type = CarType.objects.create(lang=lang, name=f"SUV {lang}")
+        for n in range(cars):
+            car = Car.objects.create(
+                lang=lang, type=car_type, brand=brand, model=f"Land Cruiser {n}", seats=4 + n, year=2018 + n,
+                features=PARAGRAPH, proccess=PARAGRAPH,
+            )
+            CarPrices.objects.bulk_create(CarPrices(car=car, days=f"{d}+", price=80 - 10 * d) for d in range(1, 4))
+            for i in range(images):
+                CarImages.objects.create(car=car, img=image_file(f"car-{n}-{i}-{lang}"), alt=f"Car {n}")
+            CarRentalRequest.objects.create(
+                car=car, first_name="Aibek", last_name="Test", email="guest@example.com", phone="+996",
+                datefrom=today + timedelta(days=10), dateto=today + timedelta(days=14), status=2,
+            )
+
+    SiteReviews.objects.bulk_create(
+        SiteReviews(firstname=f"Guest {r}", mark=5, text=PARAGRAPH, status=1) for r in range(10)
+    )
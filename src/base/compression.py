@@ -0,0 +1,110 @@
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this gain nothing from a compression frame
+MIN_SIZE = 500
+
+# JSON, XML and plain text only: HTML pages carry CSRF tokens (BREACH)
+COMPRESSIBLE = re.compile(r"^(application/(json|xml|javascript)|text/(plain|css|xml|javascript))\b")
+
+# Per-request compression is tuned for CPU; cached bodies are compressed once, so harder
+LEVELS = {"br": 4, "gzip": 6}
+CACHED_LEVELS = {"br": 9, "gzip": 9}
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def compress(content, encoding, level):
+    if encoding == "br":
+        return brotli.compress(content, quality=level)
+    return gzip.compress(content, compresslevel=level, mtime=0)
+
+
+def precompress(content):
+    """Every encoding of ``content`` at the cached levels, to store next to the raw bytes."""
+    if len(content) < MIN_SIZE:
+        return {}
+    return {encoding: compress(content, encoding, CACHED_LEVELS[encoding]) for encoding in available_encodings()}
+
+
+def negotiate(accept_encoding):
+    """The best encoding of ``Accept-Encoding`` this process can produce, brotli first; ``None`` for identity."""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when installed) or gzip for API responses, by ``Accept-Encoding``.
+
+    Responses read from a cache can carry ``encoded_variants``, bodies
+    compressed when the entry was stored; they are sent as they are, so a
+    cached body is compressed once per change rather than once per request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not COMPRESSIBLE.match(response.get("Content-Type", ""))
+            or len(response.content) < MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        variants = getattr(response, "encoded_variants", None) or {}
+        content = variants.get(encoding) or compress(response.content, encoding, LEVELS[encoding])
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = encoding
+        # The encoded body is a different representation of the same resource
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
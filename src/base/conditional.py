@@ -0,0 +1,126 @@
+import hashlib
+import json
+from datetime import date, datetime, time
+
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import mixins
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def get_validator_headers(validator, renderer_format):
+    """
+    The ``(ETag, Last-Modified)`` of a response rendered as ``renderer_format`` from ``validator``.
+
+    Both move at midnight like the date-filtered content does: the ETag
+    holds today's date and Last-Modified is never older than today's start.
+    """
+    today = date.today()
+    stamps = [value for name, value in validator.items() if name.endswith("last_mod") and value]
+    last_modified = int(max(stamps + [datetime.combine(today, time.min).astimezone()]).timestamp())
+    variant = [validator, today, renderer_format]
+    etag = f'"{hashlib.md5(json.dumps(variant, default=str).encode()).hexdigest()}"'
+    return etag, last_modified
+
+
+def set_validator_headers(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    # Revalidate every time instead of trusting a heuristic lifetime from Last-Modified
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match`` / ``If-Modified-Since`` with a 304 before the view serializes anything.
+
+    The validator is one aggregate query: the newest ``last_mod`` and the row
+    count of the objects the view returns and of each relation listed in
+    ``conditional_relations``. A paginated list only looks at the rows of the
+    requested page, which is fetched once and handed on to ``list()``, plus
+    its links, so a 304 costs two queries however long the list is. Each relation is read by correlated subqueries
+    of its own, so its cost adds to the others' instead of multiplying
+    with them as joins in one query would. Edits move ``last_mod``, additions and
+    deletions move the counts, and the date is part of the ETag because
+    prices and availability are filtered by today. Page view counters are
+    deliberately left out.
+
+    Generic views get the queryset from ``get_queryset``; other views
+    override ``get_conditional_queryset``.
+    """
+
+    conditional_relations = ()
+    _conditional_page = None
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(self, mixins.RetrieveModelMixin):
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        elif isinstance(self, mixins.ListModelMixin) and self.paginator is not None:
+            self._conditional_page = self.paginator.paginate_queryset(queryset, self.request, view=self)
+            queryset = queryset.model.objects.filter(pk__in=[obj.pk for obj in self._conditional_page])
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        if self._conditional_page is not None:
+            return self._conditional_page
+        return super().paginate_queryset(queryset)
+
+    def get_validator(self):
+        queryset = self.get_conditional_queryset()
+        model = queryset.model
+        # Filtering by pk keeps the view's own annotations and ordering out of the aggregate
+        objects = model.objects.filter(pk__in=queryset.values("pk"))
+        aggregates = {"object_id": Max("pk"), "count": Count("pk"), "last_mod": Max("last_mod")}
+        for relation in self.conditional_relations:
+            row = model.objects.filter(pk=OuterRef("pk")).values("pk")
+            objects = objects.annotate(**{
+                f"_{relation}_count": Subquery(row.annotate(value=Count(relation)).values("value")),
+                f"_{relation}_last_mod": Subquery(row.annotate(value=Max(f"{relation}__last_mod")).values("value")),
+            })
+            aggregates[f"{relation}_count"] = Sum(f"_{relation}_count")
+            aggregates[f"{relation}_last_mod"] = Max(f"_{relation}_last_mod")
+        validator = objects.aggregate(**aggregates)
+        if self._conditional_page is not None:
+            # Rows added after the page change where it ends, not the page itself
+            validator["links"] = [self.paginator.get_next_link(), self.paginator.get_previous_link()]
+        return validator
+
+    def not_modified(self, validator):
+        pass
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validator = None
+        if request.method not in ("GET", "HEAD"):
+            return
+
+        validator = self.get_validator()
+        if not validator["count"]:
+            return
+        self.validator = validator
+        self.etag, self.last_modified = get_validator_headers(validator, request.accepted_renderer.format)
+
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        if response is not None:
+            self.not_modified(validator)
+            raise NotModified(set_validator_headers(response, self.etag, self.last_modified))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "validator", None) and response.status_code == 200:
+            set_validator_headers(response, self.etag, self.last_modified)
+        return response
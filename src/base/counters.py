@@ -0,0 +1,87 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Buffers ``views`` increments in the worker and writes them in batches.
+
+    Every flush is one ``UPDATE ... SET views = views + CASE ...`` per model,
+    so only the counter column is touched (``auto_now`` fields stay put) and
+    concurrent workers never overwrite each other's increments. A worker that
+    dies without running ``atexit`` loses at most one flush interval or
+    ``VIEW_COUNTER_MAX_PENDING`` views, whichever comes first.
+    """
+
+    def __init__(self, field="views"):
+        self.field = field
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._size = 0
+        self._pid = None
+
+    def increment(self, model, pk, amount=1):
+        self._ensure_worker()
+        with self._lock:
+            self._pending[(model, pk)] += amount
+            self._size += amount
+            full = self._size >= settings.VIEW_COUNTER_MAX_PENDING
+        if full:
+            self.flush()
+
+    def pending_size(self):
+        return self._size
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._size = 0
+        if not pending:
+            return
+
+        by_model = defaultdict(list)
+        for (model, pk), amount in pending.items():
+            by_model[model].append((pk, amount))
+
+        for model, items in by_model.items():
+            delta = Case(*(When(pk=pk, then=Value(amount)) for pk, amount in items), output_field=IntegerField())
+            try:
+                model.objects.filter(pk__in=[pk for pk, _ in items]).update(**{self.field: F(self.field) + delta})
+            except Exception:
+                logger.exception("Could not flush %s view counts", model._meta.label)
+                with self._lock:
+                    for pk, amount in items:
+                        self._pending[(model, pk)] += amount
+                        self._size += amount
+
+    def _ensure_worker(self):
+        # Started lazily so every forked gunicorn worker gets its own thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._pending.clear()
+            self._size = 0
+        threading.Thread(target=self._run, name="view-counter", daemon=True).start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(settings.VIEW_COUNTER_FLUSH_INTERVAL)
+            self.flush()
+            connection.close()
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import shutil
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.db.models.signals import post_delete, pre_save
+
+from .metrics import registry
+
+
+class Derivative:
+    def __init__(self, path, etag):
+        self.path = path
+        self.etag = etag
+
+
+def _source_dir(name):
+    digest = hashlib.sha1(name.encode()).hexdigest()
+    return os.path.join(settings.IMAGE_CACHE_ROOT, digest[:2], digest)
+
+
+def compress_image(path, size, quality):
+    from PIL import Image
+
+    img = Image.open(path)
+
+    img.thumbnail(size)
+    output = BytesIO()
+    img.save(output, format="WEBP", quality=quality)
+    output.seek(0)
+
+    return output
+
+
+def get_derivative(field_file, size, quality, metric_labels=None):
+    """
+    Return the cached WEBP thumbnail of ``field_file``, encoding it on a miss.
+
+    The cache key covers the stored file name, its size and mtime and the
+    requested size/quality, so a re-upload or an in-place overwrite of the
+    original produces a new key without any explicit bookkeeping.
+    """
+    stat = os.stat(field_file.path)
+    key = hashlib.sha1(
+        f"{field_file.name}:{stat.st_size}:{stat.st_mtime_ns}:{size[0]}x{size[1]}:{quality}".encode()
+    ).hexdigest()
+    path = os.path.join(_source_dir(field_file.name), f"{size[0]}x{size[1]}-q{quality}-{key}.webp")
+
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        output = compress_image(field_file.path, size, quality)
+        registry.observe("image_compression_seconds", time.perf_counter() - started, metric_labels)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(output.getbuffer())
+        os.replace(tmp_path, path)
+
+    return Derivative(path, f'"{key}"')
+
+
+def purge_derivatives(name):
+    if name:
+        shutil.rmtree(_source_dir(name), ignore_errors=True)
+
+
+def invalidate_derivatives_on_change(model, field_name):
+    def on_pre_save(sender, instance, **kwargs):
+        if not instance.pk:
+            return
+        old_name = (
+            sender.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+        )
+        if old_name and old_name != getattr(instance, field_name).name:
+            purge_derivatives(old_name)
+
+    def on_post_delete(sender, instance, **kwargs):
+        purge_derivatives(getattr(instance, field_name).name)
+
+    uid = f"derivatives:{model._meta.label}.{field_name}"
+    pre_save.connect(on_pre_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_post_delete, sender=model, weak=False, dispatch_uid=uid)
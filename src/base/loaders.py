@@ -0,0 +1,82 @@
+from abc import ABC, abstractmethod
+
+from django.db.models import OuterRef, Subquery
+from rest_framework import serializers
+
+
+class BatchLoader(ABC):
+    """
+    Request-scoped loader that resolves every pending key with one query.
+
+    Serializers ``prime`` the keys of the objects they are about to render and
+    then ``load`` them one by one; the first ``load`` dispatches a single batch
+    for everything primed so far and later ones are answered from memory.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._pending = set()
+
+    @abstractmethod
+    def batch_load(self, keys):
+        """``{key: value}`` for ``keys``; keys missing from the result load as ``None``."""
+
+    def prime(self, keys):
+        self._pending.update(key for key in keys if key not in self._cache)
+
+    def load(self, key):
+        if key not in self._cache:
+            self._pending.add(key)
+            self.dispatch()
+        return self._cache[key]
+
+    def dispatch(self):
+        keys, self._pending = self._pending, set()
+        if not keys:
+            return
+        results = self.batch_load(list(keys))
+        for key in keys:
+            self._cache[key] = results.get(key)
+
+
+class FirstRelatedLoader(BatchLoader):
+    """The first row of ``get_queryset()`` by ``ordering`` for each ``key_field`` value."""
+
+    key_field = None
+    ordering = ("id",)
+
+    @abstractmethod
+    def get_queryset(self):
+        pass
+
+    def batch_load(self, keys):
+        # Only the row the correlated subquery picks leaves the database, not every candidate
+        first = self.get_queryset().filter(**{self.key_field: OuterRef(self.key_field)}).order_by(*self.ordering)
+        queryset = self.get_queryset().filter(**{f"{self.key_field}__in": keys}, pk=Subquery(first.values("pk")[:1]))
+        return {getattr(obj, self.key_field): obj for obj in queryset}
+
+
+def get_loader(context, loader_class):
+    loaders = context.setdefault("loaders", {})
+    if loader_class not in loaders:
+        loaders[loader_class] = loader_class()
+    return loaders[loader_class]
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        iterable = list(data.all() if hasattr(data, "all") else data)
+        self.child.prime(iterable)
+        return [self.child.to_representation(item) for item in iterable]
+
+
+class BatchLoadingMixin:
+    batch_loaders = ()
+
+    def prime(self, instances):
+        keys = [instance.pk for instance in instances]
+        for loader_class in self.batch_loaders:
+            get_loader(self.context, loader_class).prime(keys)
+
+    def load(self, loader_class, key):
+        return get_loader(self.context, loader_class).load(key)
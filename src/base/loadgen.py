@@ -0,0 +1,61 @@
+import asyncio
+import itertools
+import statistics
+import time
+
+import aiohttp
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def _load(base_url, paths, concurrency, duration, headers):
+    latencies = []
+    errors = 0
+    cycle = itertools.cycle(paths)
+    deadline = time.perf_counter() + duration
+
+    async def worker(session):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url + next(cycle), headers=headers) as response:
+                    await response.read()
+                    ok = response.status < 500
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_load(base_url, paths, concurrency=32, duration=10.0, headers=None):
+    """
+    Hit ``paths`` round-robin from ``concurrency`` keep-alive clients for ``duration`` seconds.
+
+    Responses with a 5xx status or a connection error count as errors and are
+    left out of the latency figures.
+    """
+    return asyncio.run(_load(base_url.rstrip("/"), list(paths), concurrency, duration, headers or {}))
@@ -0,0 +1,303 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import timing
+from .counters import view_counter
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "http_request_duration_seconds": ("histogram", "Request latency by URL name", LATENCY_BUCKETS),
+    "http_responses_total": ("counter", "Responses by URL name, method and status code", None),
+    "http_request_db_queries": ("histogram", "SQL queries per request by URL name", (0, 1, 2, 5, 10, 20, 50, 100)),
+    "view_cache_requests_total": ("counter", "View cache lookups by view and result", None),
+    "image_compression_seconds": ("histogram", "Time spent encoding compressed image thumbnails", LATENCY_BUCKETS),
+    "telegram_send_seconds": ("histogram", "Duration of the Telegram sendMessage call", LATENCY_BUCKETS),
+    "telegram_notification_latency_seconds": (
+        "histogram", "Time from queueing a Telegram notification to its delivery", (0.5, 1, 2, 5, 10, 30, 60, 300, 900),
+    ),
+    "telegram_notifications_total": ("counter", "Telegram delivery attempts by result", None),
+    "view_counter_pending": ("gauge", "Page views buffered in live workers and not yet written", None),
+}
+
+
+RETIRED = "retired.json"
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, data):
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _lock(operation):
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    lock = open(os.path.join(settings.METRICS_DIR, "retired.lock"), "a")
+    fcntl.flock(lock, operation)
+    return lock
+
+
+def _add(totals, snapshot):
+    for key, value in snapshot["values"].items():
+        totals["values"][key] = totals["values"].get(key, 0) + value
+    for key, counts in snapshot["histograms"].items():
+        merged = totals["histograms"].setdefault(key, [0] * len(counts))
+        for i, count in enumerate(counts):
+            merged[i] += count
+
+
+class Registry:
+    """
+    Counters and histograms of one process, merged across processes on collection.
+
+    Every process (gunicorn worker, notification worker) writes its totals
+    to ``METRICS_DIR/<pid>-<start>.json`` at most every
+    ``METRICS_FLUSH_INTERVAL`` seconds and at exit; the start time keeps a
+    process that reuses a PID from overwriting an earlier one's counts.
+    ``collect`` sums the files, so counters survive worker restarts the way
+    Prometheus expects; gauges are read from live processes only.
+
+    Files of processes that exited more than ``METRICS_RETENTION`` ago are
+    folded into ``retired.json`` before they are removed, so the totals never
+    go down. ``retired.json`` lists the files it already holds, which makes
+    a retirement interrupted between the two steps safe to redo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+        self._histograms = {}
+        self._gauges = {}
+        self._last_flush = 0.0
+        self._pid = None
+        self._started = None
+
+    def _ensure_process(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Forked from a parent that already counted: start from zero
+                    self._values.clear()
+                    self._histograms.clear()
+                    self._pid = os.getpid()
+                    self._started = time.time_ns() // 1000
+                    atexit.register(self.flush)
+
+    def inc(self, name, labels=None, amount=1):
+        self._ensure_process()
+        with self._lock:
+            self._values[_key(name, labels or {})] += amount
+
+    def observe(self, name, value, labels=None):
+        self._ensure_process()
+        buckets = METRICS[name][2]
+        key = _key(name, labels or {})
+        with self._lock:
+            histogram = self._histograms.setdefault(key, [0] * (len(buckets) + 1) + [0.0])
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def gauge(self, name, func):
+        self._gauges[name] = func
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "values": dict(self._values),
+                "histograms": {key: list(counts) for key, counts in self._histograms.items()},
+                "gauges": {_key(name, {}): func() for name, func in self._gauges.items()},
+            }
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self._pid != os.getpid():
+            return
+        self._last_flush = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        _write(os.path.join(settings.METRICS_DIR, f"{self._pid}-{self._started}.json"), self.snapshot())
+
+    def _processes(self):
+        """``(path, pid, alive)`` of every process file; only the newest file of a PID can be alive."""
+        files = []
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+            pid, _, started = os.path.basename(path)[: -len(".json")].partition("-")
+            if pid.isdigit():
+                files.append((int(started or 0), int(pid), path))
+        files.sort()
+        newest = {pid: started for started, pid, _ in files}
+        return [(path, pid, started == newest[pid] and _is_alive(pid)) for started, pid, path in files]
+
+    def _retire(self, paths):
+        with _lock(fcntl.LOCK_EX):
+            retired_path = os.path.join(settings.METRICS_DIR, RETIRED)
+            retired = _read(retired_path) or {"values": {}, "histograms": {}, "files": []}
+            # Names only need remembering while their files are still around
+            done = {name for name in retired["files"] if os.path.exists(os.path.join(settings.METRICS_DIR, name))}
+            for path in paths:
+                name = os.path.basename(path)
+                snapshot = _read(path)
+                if name not in done and snapshot is not None:
+                    _add(retired, snapshot)
+                    done.add(name)
+            retired["files"] = sorted(done)
+            _write(retired_path, retired)
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def collect(self):
+        self._ensure_process()
+        self.flush()
+        processes = self._processes()
+        expired = [path for path, _, alive in processes if not alive and _expired(path)]
+        if expired:
+            self._retire(expired)
+            processes = [process for process in processes if process[0] not in expired]
+
+        # Shared with other collectors, exclusive to a retirement: no file is counted twice or missed
+        with _lock(fcntl.LOCK_SH):
+            totals = _read(os.path.join(settings.METRICS_DIR, RETIRED)) or {"values": {}, "histograms": {}, "files": []}
+            retired = set(totals["files"])
+            gauges = defaultdict(float)
+            for path, _, alive in processes:
+                snapshot = None if os.path.basename(path) in retired else _read(path)
+                if snapshot is None:
+                    continue
+                _add(totals, snapshot)
+                if alive:
+                    for key, value in snapshot["gauges"].items():
+                        gauges[key] += value
+        return totals["values"], totals["histograms"], gauges
+
+    def render(self):
+        values, histograms, gauges = self.collect()
+        series = defaultdict(list)
+        for key, value in sorted([*values.items(), *gauges.items()]):
+            name, labels = json.loads(key)
+            series[name].append(f"{name}{_labels(labels)} {_number(value)}")
+        for key, counts in sorted(histograms.items()):
+            name, labels = json.loads(key)
+            cumulative = 0
+            for le, count in zip([*METRICS[name][2], "+Inf"], counts[:-1]):
+                cumulative += count
+                series[name].append(f"{name}_bucket{_labels(labels + [['le', str(le)]])} {cumulative}")
+            series[name].append(f"{name}_sum{_labels(labels)} {_number(counts[-1])}")
+            series[name].append(f"{name}_count{_labels(labels)} {cumulative}")
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text, _ = METRICS[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *series[name]]
+        return "\n".join(lines) + "\n"
+
+
+def _expired(path):
+    try:
+        return time.time() - os.path.getmtime(path) > settings.METRICS_RETENTION
+    except FileNotFoundError:
+        # Retired by another collector meanwhile
+        return False
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _number(value):
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+registry = Registry()
+registry.gauge("view_counter_pending", view_counter.pending_size)
+
+
+class MetricsMiddleware:
+    """
+    Count every response and observe its latency and SQL queries, labelled by URL name.
+
+    Queries are only counted here; timing them is left to the sampled
+    ``ServerTimingMiddleware``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        timing.instrument()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        count, token = timing.begin_count()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.end_count(token)
+        self.record(request, response, count.queries, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        count, token = timing.begin_count()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.end_count(token)
+        self.record(request, response, count.queries, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, queries, duration):
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        registry.inc("http_responses_total", {"view": view, "method": request.method, "status": response.status_code})
+        registry.observe("http_request_duration_seconds", duration, {"view": view})
+        registry.observe("http_request_db_queries", queries, {"view": view})
+        registry.maybe_flush()
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+# Shared by the outbox tables (tg_bot.Notification, account.SendMail): rows
+# with status 1 are due once next_attempt_at has passed, 2 is delivered and
+# 3 has given up.
+QUEUED, SENT, FAILED = 1, 2, 3
+
+
+def claim(model, batch_size, lease):
+    """
+    Lock a batch of due rows and push their next attempt past the lease.
+
+    ``skip_locked`` lets several workers run side by side; a worker that dies
+    mid-batch only delays its rows until the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            model.objects.select_for_update(skip_locked=True)
+            .filter(status=QUEUED, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        model.objects.filter(pk__in=[row.pk for row in rows]).update(next_attempt_at=now + timedelta(seconds=lease))
+    return rows
+
+
+def release(rows):
+    """Hand claimed rows that were not attempted back to the queue without waiting for the lease."""
+    if rows:
+        type(rows[0]).objects.filter(pk__in=[row.pk for row in rows], status=QUEUED).update(
+            next_attempt_at=timezone.now()
+        )
+
+
+def mark_sent(row, duration, **fields):
+    type(row).objects.filter(pk=row.pk).update(
+        status=SENT,
+        attempts=row.attempts + 1,
+        sent_at=timezone.now(),
+        send_duration_ms=round(duration * 1000),
+        last_error="",
+        **fields,
+    )
+
+
+def mark_failed(row, error, delay, max_attempts):
+    """Schedule another attempt in ``delay`` seconds, or give up if ``delay`` is None or attempts ran out."""
+    attempts = row.attempts + 1
+    give_up = delay is None or attempts >= max_attempts
+    type(row).objects.filter(pk=row.pk).update(
+        status=FAILED if give_up else QUEUED,
+        attempts=attempts,
+        next_attempt_at=timezone.now() + timedelta(seconds=delay or 0),
+        last_error=f"{type(error).__name__}: {error}",
+    )
@@ -1,6 +1,138 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict, namedtuple
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-class ReviewsListPagination(PageNumberPagination):
-    page = 4
-    page_size = 4
\ No newline at end of file
+Cursor = namedtuple("Cursor", ["reverse", "position"])
+
+
+def invert(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a composite ``(..., id)`` ordering.
+
+    The cursor holds the value of every ordering field for the row at the
+    page edge, and the next page is the rows strictly after it: for
+    ``("-rating", "-id")`` that is ``rating <= r AND (rating < r OR
+    (rating = r AND id < i))``, an index range scan with no ``OFFSET``, so
+    a deep page inside a run of equal ratings costs the same as the first.
+    The ordering must end on ``id`` to make that position unique.
+
+    Instead of a total the response carries ``has_more``, which falls out of
+    the extra row. A queryset that arrives already ordered (search results
+    ranked by relevance) keeps its ordering; every field of it must be a
+    plain attribute of the rows, model field or annotation.
+    """
+
+    ordering = ("-id",)
+
+    def get_ordering(self, request, queryset, view):
+        if queryset.query.order_by:
+            ordering = tuple(queryset.query.order_by)
+        else:
+            ordering = super().get_ordering(request, queryset, view)
+        assert all(isinstance(field, str) for field in ordering), (
+            "KeysetPagination needs field names to order by, not expressions; annotate them first."
+        )
+        assert ordering[-1].lstrip("-") in ("id", "pk"), (
+            f"KeysetPagination needs an ordering that ends on id, got {ordering!r}."
+        )
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+
+        queryset = queryset.order_by(*(map(invert, self.ordering) if reverse else self.ordering))
+        if self.cursor:
+            queryset = queryset.filter(self.after(self.cursor.position, reverse))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def after(self, position, reverse=False):
+        """Rows past ``position`` in the walking direction, with the leading field as a range bound."""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            descending = field.startswith("-") != reverse
+            step = Q(**{f"{field.lstrip('-')}__{'lt' if descending else 'gt'}": position[i]})
+            for previous, value in zip(self.ordering[:i], position):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+
+        leading = self.ordering[0]
+        descending = leading.startswith("-") != reverse
+        return Q(**{f"{leading.lstrip('-')}__{'lte' if descending else 'gte'}": position[0]}) & condition
+
+    def get_position(self, instance):
+        return [getattr(instance, field.lstrip("-")) for field in self.ordering]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self.get_position(self.page[-1]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.get_position(self.page[0]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            cursor = Cursor(reverse=bool(data["r"]), position=list(data["p"]))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(cursor.position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, cursor):
+        data = json.dumps({"r": int(cursor.reverse), "p": cursor.position}, cls=DjangoJSONEncoder, separators=(",", ":"))
+        encoded = urlsafe_b64encode(data.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("has_more", self.has_next),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["has_more"] = {"type": "boolean"}
+        return response_schema
+
+
+class ReviewsListPagination(KeysetPagination):
+    page_size = 4
@@ -0,0 +1,48 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` output produced by orjson, when it is installed.
+
+    Compact UTF-8 like DRF's defaults; whatever orjson does not encode
+    natively (Decimal, lazy strings, querysets, and datetimes, to keep DRF's
+    millisecond ``Z`` format) goes through DRF's own encoder. Indented
+    output and a missing orjson fall back to the stock renderer.
+    """
+
+    options = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if orjson else 0
+    )
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        ret = orjson.dumps(data, default=self._encoder.default, option=self.options)
+        # Same escaping as JSONRenderer: both are valid JSON but end a JavaScript line
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class StaffContentNegotiation(DefaultContentNegotiation):
+    """Offer the browsable API to staff sessions only; everyone else negotiates among the other renderers."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        # Admin session (AuthenticationMiddleware) or the API's own Basic/Token credentials
+        session_user = getattr(request._request, "user", None)
+        if not (session_user and session_user.is_staff or request.user.is_staff):
+            renderers = [renderer for renderer in renderers if not isinstance(renderer, BrowsableAPIRenderer)]
+        return super().select_renderer(request, renderers, format_suffix)
@@ -0,0 +1,7 @@
+import random
+
+
+def backoff_delay(attempt, base=2.0, cap=600.0):
+    """Seconds to wait before retry number ``attempt`` (1-based): exponential, capped, with jitter."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .catalog import seed_catalog
+from .counters import view_counter
+
+
+class EndpointTestMixin:
+    """
+    Throwaway media and metrics directories, no caching, and no flushes of buffered views mid-test.
+
+    The suite needs nothing from the environment beyond ``DB_ENGINE=sqlite``
+    (or the PostgreSQL settings) when run with ``nomad.settings_test``, and
+    notifications are queued for a stand-in Telegram chat.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media_root = tempfile.mkdtemp(prefix="nomad-test-media-")
+        cls._settings = override_settings(
+            MEDIA_ROOT=cls._media_root,
+            IMAGE_CACHE_ROOT=f"{cls._media_root}/cache",
+            METRICS_DIR=f"{cls._media_root}/metrics",
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+            VIEW_COUNTER_FLUSH_INTERVAL=3600,
+            VIEW_COUNTER_MAX_PENDING=10 ** 6,
+        )
+        cls._chat_id = mock.patch("src.tg_bot.bot.CHAT_ID", "1")
+        cls._settings.enable()
+        cls._chat_id.start()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._chat_id.stop()
+            cls._settings.disable()
+            shutil.rmtree(cls._media_root, ignore_errors=True)
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._chat_id.stop()
+            cls._settings.disable()
+            shutil.rmtree(cls._media_root, ignore_errors=True)
+
+    def tearDown(self):
+        # Buffered views belong to this test's data, not to whatever runs at exit
+        view_counter.flush()
+        super().tearDown()
+
+
+class EndpointBudgetTestCase(EndpointTestMixin, TestCase):
+    """
+    Endpoint tests against a seeded catalog in all six languages.
+
+    ``assertBudget`` requests a URL and fails when it runs more SQL queries,
+    or spends longer in the database, than the budget written next to it.
+    Caching is off so every request shows its real query plan; raise a
+    budget only together with the change that needs it.
+    """
+
+    db_time_budget_ms = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog()
+
+    def request(self, method, url, **kwargs):
+        queries = []
+
+        def timer(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append((sql, time.perf_counter() - started))
+
+        with connection.execute_wrapper(timer):
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, queries
+
+    def assertBudget(self, url, queries, method="get", status=200, db_time_ms=None, **kwargs):
+        if method == "post":
+            kwargs.setdefault("content_type", "application/json")
+        response, executed = self.request(method, url, **kwargs)
+        if response.status_code != status:
+            body = b"" if response.streaming else response.content[:500]
+            self.fail(f"{method.upper()} {url} returned {response.status_code}, expected {status}: {body!r}")
+
+        listing = "\n".join(f"  {sql}" for sql, _ in executed)
+        self.assertLessEqual(
+            len(executed), queries, f"{method.upper()} {url} ran {len(executed)} queries, budget {queries}:\n{listing}"
+        )
+        db_time_ms = db_time_ms or self.db_time_budget_ms
+        spent = sum(duration for _, duration in executed) * 1000
+        self.assertLessEqual(spent, db_time_ms, f"{method.upper()} {url} spent {spent:.1f} ms in the database")
+        return response
+
+
+class CommittedCatalogTestCase(EndpointTestMixin, TransactionTestCase):
+    """
+    The seeded catalog committed, for views that read it on connections of their own (``gather_sync``).
+
+    Slower than ``EndpointBudgetTestCase``: the catalog is seeded for every
+    test and the tables are flushed after it.
+    """
+
+    def setUp(self):
+        super().setUp()
+        seed_catalog()
@@ -0,0 +1,207 @@
+import contextvars
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("request_timings", default=None)
+_counted = contextvars.ContextVar("query_count", default=None)
+_serializing = contextvars.ContextVar("serializing", default=False)
+
+
+@dataclass
+class QueryCount:
+    queries: int = 0
+
+
+@dataclass
+class RequestTimings:
+    queries: int = 0
+    db: float = 0.0
+    serializer: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+def begin():
+    """Collect timings for the current request, joining a collection an outer middleware started."""
+    timings = _current.get()
+    if timings is not None:
+        return timings, None
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end(token):
+    if token is not None:
+        _current.reset(token)
+
+
+def begin_count():
+    """
+    Count the SQL queries of the current request without timing anything.
+
+    Cheap enough for every request; the timed work (query durations,
+    serializer time) stays with the sample ``begin()`` collects.
+    """
+    count = _counted.get()
+    if count is not None:
+        return count, None
+    count = QueryCount()
+    return count, _counted.set(count)
+
+
+def end_count(token):
+    if token is not None:
+        _counted.reset(token)
+
+
+def record_cache(hit):
+    timings = _current.get()
+    if timings is not None:
+        if hit:
+            timings.cache_hits += 1
+        else:
+            timings.cache_misses += 1
+
+
+def _record_query(execute, sql, params, many, context):
+    count = _counted.get()
+    if count is not None:
+        count.queries += 1
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db += time.perf_counter() - started
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    # Every connection, including the ones sync_to_async threads open, reports to the
+    # request in its context; only a counter bump when the request is not sampled
+    if _record_query not in connection.execute_wrappers:
+        # Outermost, so the LIFO pop of a later ``connection.execute_wrapper()`` leaves it installed
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _timed_data(prop):
+    def data(self):
+        timings = _current.get()
+        if timings is None or _serializing.get():
+            return prop.fget(self)
+        # Serializers built inside another one's .data are part of its time
+        token = _serializing.set(True)
+        started = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            timings.serializer += time.perf_counter() - started
+            _serializing.reset(token)
+
+    return property(data)
+
+
+_instrumented = False
+
+
+def instrument():
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+    connection_created.connect(_install_wrapper, dispatch_uid="timing:connection")
+    # Connections opened before the first request (checks, the test runner) are already past the signal
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(None, connection)
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        cls.data = _timed_data(vars(cls)["data"])
+
+
+def show_toolbar(request):
+    return bool(getattr(request, "user", None) and request.user.is_staff)
+
+
+class ServerTimingMiddleware:
+    """
+    Time a sample of requests and report them in ``Server-Timing`` and a log line.
+
+    ``SERVER_TIMING_SAMPLE_RATE`` of anonymous requests are measured (total,
+    DB queries and time, serializer time, view cache hits); requests from
+    staff sessions always are. Unsampled requests only pay for a random draw.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0.05)
+        instrument()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def has_session(self, request):
+        # Only requests that carry a session can be staff; the public API never does
+        return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate and not (self.has_session(request) and show_toolbar(request)):
+            return self.get_response(request)
+        timings, token = begin()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            end(token)
+        return self.finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate and not (
+            self.has_session(request) and await sync_to_async(show_toolbar)(request)
+        ):
+            return await self.get_response(request)
+        timings, token = begin()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end(token)
+        return self.finish(request, response, timings, started)
+
+    def finish(self, request, response, timings, started):
+        total = (time.perf_counter() - started) * 1000
+        response["Server-Timing"] = ", ".join([
+            f"total;dur={total:.1f}",
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+            f"serializer;dur={timings.serializer * 1000:.1f}",
+            f'cache;desc="{timings.cache_hits} hit {timings.cache_misses} miss"',
+        ])
+        match = request.resolver_match
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(total, 1),
+            "db_queries": timings.queries,
+            "db_ms": round(timings.db * 1000, 1),
+            "serializer_ms": round(timings.serializer * 1000, 1),
+            "cache_hits": timings.cache_hits,
+            "cache_misses": timings.cache_misses,
+        }))
+        return response
@@ -0,0 +1,78 @@
+import hmac
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import parse_etags
+from rest_framework import generics, views
+
+from .images import get_derivative
+from .metrics import registry
+
+
+def file_response(path, content_type):
+    """
+    Send the file at ``path``, through nginx when ``MEDIA_ACCEL_REDIRECT`` is on.
+
+    Files under ``MEDIA_ROOT`` are then answered with an empty body and an
+    ``X-Accel-Redirect`` to the internal location of nginx/default.conf, so
+    the worker is free as soon as the headers are written.
+    """
+    root = os.path.join(os.path.abspath(settings.MEDIA_ROOT), "")
+    path = os.path.abspath(path)
+    if settings.MEDIA_ACCEL_REDIRECT and path.startswith(root):
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(path[len(root):])
+        return response
+    return FileResponse(open(path, "rb"), content_type=content_type)
+
+
+class CompressedImageView(views.APIView):
+    model = None
+    image_field = "img"
+    lookup_url_kwarg = None
+    size = (500, 500)
+    quality = 50
+
+    def get(self, request, *args, **kwargs):
+        obj = generics.get_object_or_404(
+            self.model.objects.only("id", self.image_field), id=kwargs[self.lookup_url_kwarg]
+        )
+        image = getattr(obj, self.image_field)
+        if not image:
+            raise Http404
+
+        try:
+            derivative = get_derivative(image, self.size, self.quality, {"view": type(self).__name__})
+        except FileNotFoundError:
+            raise Http404
+
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if derivative.etag in if_none_match or "*" in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = file_response(derivative.path, "image/webp")
+
+        response["ETag"] = derivative.etag
+        response["Cache-Control"] = "public, max-age=3600"
+        return response
+
+
+def metrics(request):
+    """Prometheus exposition of all workers, for a ``Bearer METRICS_TOKEN`` scrape or a staff session."""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    scraper = bool(token) and hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode())
+    if not (scraper or request.user.is_staff):
+        raise Http404
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def media(request, path):
+    """Uploaded files under ``MEDIA_URL``, handed to nginx instead of the ``static()`` route."""
+    full_path = safe_join(settings.MEDIA_ROOT, path)
+    content_type, _ = mimetypes.guess_type(full_path)
+    return file_response(full_path, content_type or "application/octet-stream")
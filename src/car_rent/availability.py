@@ -0,0 +1,98 @@
+import calendar
+from datetime import date, timedelta
+
+from django.contrib.postgres.fields import DateRangeField
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateRange
+from django.db.models import Exists, F, Func, OuterRef, Value
+
+from .models import BLOCKING_STATUSES, CarRentalRequest, availability_cache_key
+
+
+class DateRangeFunc(Func):
+    function = "daterange"
+    output_field = DateRangeField()
+
+
+def inclusive_period(datefrom, dateto):
+    """``[datefrom, dateto]`` as a Postgres daterange expression; both ends are booked days."""
+    return DateRangeFunc(datefrom, dateto, Value("[]"))
+
+
+def blocking_requests(queryset, datefrom, dateto):
+    """
+    Narrow rental requests to blocking ones that overlap ``datefrom``..``dateto``.
+
+    On PostgreSQL this is a ``period && daterange(...)`` test answered by the
+    partial GiST index; other databases compare the date columns directly.
+    """
+    queryset = queryset.filter(status__in=BLOCKING_STATUSES)
+    if connection.vendor == "postgresql":
+        return queryset.filter(period__overlap=DateRange(datefrom, dateto, "[]"))
+    return queryset.filter(datefrom__lte=dateto, dateto__gte=datefrom)
+
+
+def is_booked(car, datefrom, dateto, exclude_pk=None):
+    queryset = CarRentalRequest.objects.filter(car=car)
+    if exclude_pk:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return blocking_requests(queryset, datefrom, dateto).exists()
+
+
+def free_between(cars, datefrom, dateto):
+    """Keep the cars of ``cars`` without a blocking request in the window, as one anti-join."""
+    booked = blocking_requests(CarRentalRequest.objects.filter(car=OuterRef("pk")), datefrom, dateto)
+    return cars.exclude(Exists(booked))
+
+
+def update_periods(queryset):
+    return queryset.update(period=inclusive_period(F("datefrom"), F("dateto")))
+
+
+def merge_ranges(ranges):
+    """Sort ``(start, end)`` pairs and fold overlapping or back-to-back ones together."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def month_bitmaps(ranges):
+    """``{"YYYY-MM": mask}`` where bit ``n`` of ``mask`` marks day ``n + 1`` as booked."""
+    months = {}
+    for start, end in ranges:
+        day = start
+        while day <= end:
+            last = min(end, day.replace(day=calendar.monthrange(day.year, day.month)[1]))
+            key = f"{day:%Y-%m}"
+            months[key] = months.get(key, 0) | ((1 << (last.day - day.day + 1)) - 1) << (day.day - 1)
+            day = last + timedelta(days=1)
+    return months
+
+
+def availability_calendar(car_id):
+    """
+    Booked days of a car from today on, as merged ranges and per-month bitmaps.
+
+    Built once per car and day and cached until a rental request of the car
+    changes, so the cost of a detail response does not grow with bookings.
+    """
+    today = date.today()
+    key = availability_cache_key(car_id)
+    result = cache.get(key)
+    if result is None or result["day"] != today.isoformat():
+        ranges = merge_ranges(
+            CarRentalRequest.objects.filter(car_id=car_id, status__in=BLOCKING_STATUSES, dateto__gte=today)
+            .values_list("datefrom", "dateto")
+        )
+        result = {
+            "day": today.isoformat(),
+            "ranges": [[start.isoformat(), end.isoformat()] for start, end in ranges],
+            "months": month_bitmaps(ranges),
+        }
+        cache.set(key, result, 60 * 60 * 24)
+    return result
@@ -0,0 +1,76 @@
+from django.db.models import FloatField, Value
+from django.db.models.functions import Coalesce
+from rest_framework import filters
+
+from .serializers import CarFilterSerializer
+
+FEATURES = ("conditioner", "rear_view", "bluetooth")
+
+
+class CarFilter(filters.BaseFilterBackend):
+    """Narrow the car listing by seats, brand, year, features and price range from the query string."""
+
+    def filter_queryset(self, request, queryset, view):
+        params = CarFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        if "seats" in data:
+            queryset = queryset.filter(seats__gte=data["seats"])
+        if data.get("brand"):
+            queryset = queryset.filter(brand_id__in=data["brand"])
+        if "year_from" in data:
+            queryset = queryset.filter(year__gte=data["year_from"])
+        if "year_to" in data:
+            queryset = queryset.filter(year__lte=data["year_to"])
+        for feature in FEATURES:
+            if data.get(feature):
+                queryset = queryset.filter(**{feature: True})
+        if "price_min" in data:
+            queryset = queryset.filter(min_price__gte=data["price_min"])
+        if "price_max" in data:
+            queryset = queryset.filter(min_price__lte=data["price_max"])
+        return queryset
+
+
+class CarOrderingFilter(filters.OrderingFilter):
+    """
+    ``?ordering=price|-price|year|-year|seats|-seats|rating|-rating``.
+
+    Every ordering ends on ``id`` so cursor pages are stable. Nullable columns
+    are sorted through a coalesced annotation, so a keyset cursor never has
+    to compare against NULL; cars without a price, year or seat count sort
+    after the others in both directions.
+    """
+
+    field_map = {
+        "price": "sort_price",
+        "year": "sort_year",
+        "seats": "sort_seats",
+        "rating": "rating",
+    }
+    nullable = {
+        "sort_price": "min_price",
+        "sort_year": "year",
+        "sort_seats": "seats",
+    }
+    ordering_fields = list(field_map)
+
+    def get_ordering(self, request, queryset, view):
+        param = request.query_params.get(self.ordering_param, "").strip()
+        field = self.field_map.get(param.lstrip("-"))
+        if not field:
+            return self.get_default_ordering(view)
+        if param.startswith("-"):
+            return (f"-{field}", "-id")
+        return (field, "id")
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        sort_field = ordering[0].lstrip("-")
+        if sort_field in self.nullable:
+            missing = float("-inf") if ordering[0].startswith("-") else float("inf")
+            queryset = queryset.annotate(
+                **{sort_field: Coalesce(self.nullable[sort_field], Value(missing), output_field=FloatField())}
+            )
+        return queryset.order_by(*ordering)
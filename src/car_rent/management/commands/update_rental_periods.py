@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from src.car_rent.availability import update_periods
+from src.car_rent.models import CarRentalRequest
+
+
+class Command(BaseCommand):
+    help = "Fill CarRentalRequest.period from datefrom/dateto for every request"
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Rental periods require PostgreSQL")
+
+        count = update_periods(CarRentalRequest.objects.all())
+        self.stdout.write(f"{count} rental requests")
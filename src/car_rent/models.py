@@ -1,8 +1,16 @@
-from datetime import timedelta
-from django.db import models
+from django.contrib.postgres.fields import DateRangeField
+from django.contrib.postgres.indexes import GistIndex
+from django.db import connection, models
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.backends.postgresql.psycopg_any import DateRange
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.contrib.contenttypes.fields import GenericRelation
 from django.utils.translation import gettext_lazy as _
 from ckeditor.fields import RichTextField
 from django_resized import ResizedImageField
+from src.media.pipeline import register as register_derivatives
 
 
 class CarType(models.Model):
@@ -15,7 +23,7 @@ class CarType(models.Model):
         ("jp", "Японский"),
     )
     
-    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en")
+    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en", max_length=2)
     name = models.CharField(_("Название"), max_length=255)
 
     def __str__(self):
@@ -40,8 +48,10 @@ class Brand(models.Model):
 class Images(models.Model):
     car = models.ForeignKey("Car", verbose_name=_("Авто"), on_delete=models.CASCADE, related_name="car_images")
     img = ResizedImageField(_("Изображение авто"), upload_to="car_images", null=True, blank=True, force_format="WEBP", quality=50)
-    alt = models.CharField(null=True, blank=True)
-    img_title = models.CharField(null=True, blank=True)
+    alt = models.CharField(max_length=255, null=True, blank=True)
+    img_title = models.CharField(max_length=255, null=True, blank=True)
+    derivatives = GenericRelation("media.ImageDerivative")
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
 
     def __str__(self):
         return self.car.model
@@ -55,6 +65,7 @@ class Prices(models.Model):
     car = models.ForeignKey("Car", verbose_name=_("Авто"), on_delete=models.CASCADE, related_name="car_prices")
     days = models.CharField(_("Длительность аренды"), max_length=100, null=True, blank=True)
     price = models.FloatField(_("Стоимость аренды"), null=True, blank=True)
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
 
     def __str__(self):
         return self.car.model
@@ -62,6 +73,9 @@ class Prices(models.Model):
     class Meta:
         verbose_name = _("Цена аренды")
         verbose_name_plural = _("Цены")
+        indexes = [
+            models.Index(fields=["car", "price"], name="car_price_min"),
+        ]
 
 
 class Car(models.Model):
@@ -74,7 +88,7 @@ class Car(models.Model):
         ("jp", "Японский"),
     )
     
-    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en")
+    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en", max_length=2)
     RATING_CHOICES = (
         (1, 1),
         (2, 2),
@@ -117,24 +131,31 @@ class Car(models.Model):
     economy = models.BooleanField(_("Экономичность"), choices=ECONOMY_CHOICES, default=True)
     rear_view = models.BooleanField(_("Камера заднего вида"), choices=REAR_VIEW_CHOICES, default=False)
     bluetooth = models.BooleanField(_("Bluetooth"), choices=CONDITIONER_CHOICES, default=True)
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
     
 
     def __str__(self):
         return self.model
     
-    def unavailable_dates(self):
-        unavailable_dates = []
-        rental_requests = CarRentalRequest.objects.filter(car=self, status=2)
-        
-        for request in rental_requests:
-            date_range = [request.datefrom + timedelta(days=x) for x in range((request.dateto - request.datefrom).days + 1)]
-            unavailable_dates.extend(date_range)
-        
-        return unavailable_dates
-
     class Meta:
         verbose_name = _("Авто")
         verbose_name_plural = _("Авто")
+        indexes = [
+            models.Index(fields=["type", "status", "-rating", "-id"], name="car_listing"),
+        ]
+
+
+class PeriodField(DateRangeField):
+    """A daterange on PostgreSQL; elsewhere the column is left NULL and written without the ``::daterange`` cast."""
+
+    def get_placeholder(self, value, compiler, connection):
+        if connection.vendor != "postgresql":
+            return "%s"
+        return super().get_placeholder(value, compiler, connection)
+
+
+# Statuses that take the car off the road for datefrom..dateto
+BLOCKING_STATUSES = (2,)
 
 
 class CarRentalRequest(models.Model):
@@ -144,6 +165,7 @@ class CarRentalRequest(models.Model):
         (2, _("Куплено")),
         (3, _("Завершено"))
     )
+    BLOCKING_STATUSES = BLOCKING_STATUSES
 
     # Контактные данные
     first_name = models.CharField(_("Имя"), max_length=100)
@@ -157,10 +179,50 @@ class CarRentalRequest(models.Model):
     comment = models.TextField(_("Комментарии и дополнительная информация"), null=True, blank=True)
     datefrom = models.DateField(_("Дата начала"))
     dateto = models.DateField(_("Дата окончания"))
+    # datefrom..dateto as a daterange, kept in sync on save (PostgreSQL only)
+    period = PeriodField(null=True, editable=False)
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    def clean(self):
+        # Caught here, so the admin shows a form error instead of the DataError of an inverted daterange
+        if self.datefrom and self.dateto and self.dateto < self.datefrom:
+            raise ValidationError({"dateto": _("Дата окончания раньше даты начала")})
+
+    def save(self, *args, **kwargs):
+        if connection.vendor == "postgresql" and self.datefrom and self.dateto:
+            self.period = DateRange(self.datefrom, self.dateto, "[]")
+        return super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = _("Заявка на авто")
         verbose_name_plural = _("Заявки на авто")
+        indexes = [
+            GistIndex(
+                fields=["period"], name="car_request_blocking_period", condition=models.Q(status__in=BLOCKING_STATUSES)
+            ),
+        ]
+
+
+def availability_cache_key(car_id):
+    return f"car-availability:{car_id}"
+
+
+@receiver(pre_save, sender=CarRentalRequest)
+def remember_car(sender, instance, raw=False, **kwargs):
+    instance._previous_car_id = None
+    if instance.pk and not raw:
+        instance._previous_car_id = sender.objects.filter(pk=instance.pk).values_list("car_id", flat=True).first()
+
+
+@receiver(post_save, sender=CarRentalRequest)
+@receiver(post_delete, sender=CarRentalRequest)
+def invalidate_availability(sender, instance, **kwargs):
+    # A request moved to another car frees the days of the car it came from
+    car_ids = {instance.car_id, getattr(instance, "_previous_car_id", None)} - {None}
+    cache.delete_many([availability_cache_key(car_id) for car_id in car_ids])
+
+
+register_derivatives(Images, "img")
@@ -0,0 +1,8 @@
+from src.base.pagination import KeysetPagination
+
+
+class CarListPagination(KeysetPagination):
+    page_size = 12
+    page_size_query_param = "page_size"
+    max_page_size = 48
+    ordering = ("-rating", "-id")
@@ -1,9 +1,16 @@
 from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
 
+from django.core.files.storage import default_storage
+
+from src.media.serializers import SrcsetField
+from .availability import availability_calendar, is_booked
 from .models import *
 
 
 class CarImagesSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = Images
         fields = "__all__"
@@ -17,9 +24,9 @@ class CarPricesSerializer(serializers.ModelSerializer):
 
 class CarListSerializer(serializers.ModelSerializer):
     img = serializers.SerializerMethodField()
-    alt = serializers.CharField(read_only=True)
-    img_title = serializers.CharField(read_only=True)
-    price = serializers.SerializerMethodField()
+    alt = serializers.CharField(source="cover_alt", read_only=True)
+    img_title = serializers.CharField(source="cover_title", read_only=True)
+    price = serializers.FloatField(source="min_price", read_only=True)
     brand_name = serializers.CharField(source="brand.name", read_only=True)
 
     class Meta:
@@ -38,28 +45,10 @@ class CarListSerializer(serializers.ModelSerializer):
         ]
 
     def get_img(self, obj):
-        first_img = obj.car_images.all()
-        if first_img:
-            return f"https://nomadslife.travel{first_img[0].img.url}"
+        if obj.cover_img:
+            return f"https://nomadslife.travel{default_storage.url(obj.cover_img)}"
         return None
 
-    def get_price(self, obj):
-        prices = obj.car_prices.all()
-        if prices:
-            min_price = min(i.price for i in prices)
-            return min_price
-        return None
-
-    def to_representation(self, instance):
-        image = instance.car_images.first()
-
-        representation = super().to_representation(instance)
-
-        if image:
-            representation["alt"] = image.alt
-            representation["img_title"] = image.img_title
-        return representation
-
 
 class CarTypeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -72,6 +61,7 @@ class CarDetailSerializer(serializers.ModelSerializer):
     car_prices = CarPricesSerializer(many=True)
     brand_name = serializers.CharField(source="brand.name", read_only=True)
     type_name = serializers.CharField(source="type.name", read_only=True)
+    unavailable = serializers.SerializerMethodField()
 
     class Meta:
         model = Car
@@ -93,9 +83,17 @@ class CarDetailSerializer(serializers.ModelSerializer):
             "bluetooth",
             "proccess",
             "features",
-            "unavailable_dates",
+            "unavailable",
         ]
 
+    def get_unavailable(self, obj):
+        result = availability_calendar(obj.id)
+        data = {"ranges": result["ranges"]}
+        request = self.context.get("request")
+        if request and request.query_params.get("calendar") == "bitmap":
+            data["months"] = result["months"]
+        return data
+
 
 class CarRequestSerializer(serializers.ModelSerializer):
     model = serializers.ReadOnlyField(source="car.model")
@@ -114,6 +112,35 @@ class CarRequestSerializer(serializers.ModelSerializer):
             "model",
         ]
 
+    def validate(self, attrs):
+        if attrs["dateto"] < attrs["datefrom"]:
+            raise serializers.ValidationError({"dateto": _("Дата окончания раньше даты начала")})
+        if is_booked(attrs["car"], attrs["datefrom"], attrs["dateto"]):
+            raise serializers.ValidationError({"car": _("Авто уже забронировано на эти даты")})
+        return attrs
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError({"end": _("Дата окончания раньше даты начала")})
+        return attrs
+
+
+class CarFilterSerializer(serializers.Serializer):
+    seats = serializers.IntegerField(required=False, min_value=1)
+    brand = serializers.ListField(child=serializers.IntegerField(), required=False)
+    year_from = serializers.IntegerField(required=False)
+    year_to = serializers.IntegerField(required=False)
+    conditioner = serializers.BooleanField(required=False)
+    rear_view = serializers.BooleanField(required=False)
+    bluetooth = serializers.BooleanField(required=False)
+    price_min = serializers.FloatField(required=False, min_value=0)
+    price_max = serializers.FloatField(required=False, min_value=0)
+
 
 class BrandSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,3 +1,153 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+
+from src.base.testing import EndpointBudgetTestCase
+from .availability import availability_calendar, merge_ranges, month_bitmaps
+from .models import Car, CarRentalRequest, CarType
+from .serializers import CarRequestSerializer
+
+
+class CarEndpointTests(EndpointBudgetTestCase):
+    def setUp(self):
+        self.car_type = CarType.objects.get(lang="en")
+        self.car = Car.objects.filter(type=self.car_type).first()
+
+    def test_car_list(self):
+        response = self.assertBudget(f"/api/car/list/{self.car_type.pk}?ordering=price", queries=2)
+        self.assertEqual(len(response.json()["results"]), 3)
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            page = self.assertBudget(url, queries=2).json()
+            ids += [car["id"] for car in page["results"]]
+            pages.append(page)
+            url = page["next"]
+        return ids, pages
+
+    def test_car_list_keyset_pages_through_ties(self):
+        cars = Car.objects.filter(type=self.car_type)
+        cars.update(rating=4)
+        cars.filter(pk=self.car.pk).update(year=None)
+        expected = sorted(cars.values_list("id", flat=True), reverse=True)
+
+        ids, pages = self.walk(f"/api/car/list/{self.car_type.pk}?page_size=1")
+        self.assertEqual(ids, expected)
+        self.assertFalse(pages[-1]["has_more"])
+        self.assertIsNone(pages[0]["previous"])
+        previous = self.assertBudget(pages[-1]["previous"], queries=2).json()
+        self.assertEqual([car["id"] for car in previous["results"]], expected[-2:-1])
+
+        # The car without a year comes last whichever way years are sorted
+        for ordering in ("year", "-year"):
+            with self.subTest(ordering=ordering):
+                ids, _ = self.walk(f"/api/car/list/{self.car_type.pk}?page_size=1&ordering={ordering}")
+                self.assertEqual(sorted(ids), sorted(expected))
+                self.assertEqual(ids[-1], self.car.pk)
+
+    def test_car_list_filtered(self):
+        self.assertBudget(f"/api/car/list/{self.car_type.pk}?seats=5&conditioner=false&price_max=100", queries=2)
+
+    def test_available_cars(self):
+        start = date.today() + timedelta(days=12)
+        url = f"/api/car/available/{self.car_type.pk}?start={start}&end={start + timedelta(days=3)}"
+        response = self.assertBudget(url, queries=2)
+        self.assertEqual(response.json()["results"], [])
+
+    def test_car_types(self):
+        self.assertBudget("/api/en/car/list/type", queries=1)
+
+    def test_car_detail(self):
+        response = self.assertBudget(f"/api/car/detail/{self.car.pk}?calendar=bitmap", queries=6)
+        self.assertEqual(len(response.json()["unavailable"]["ranges"]), 1)
+
+    def test_car_request(self):
+        start = date.today() + timedelta(days=40)
+        data = {
+            "car": self.car.pk,
+            "first_name": "Guest",
+            "last_name": "Test",
+            "email": "guest@example.com",
+            "phone": "+996",
+            "datefrom": str(start),
+            "dateto": str(start + timedelta(days=3)),
+        }
+        response = self.assertBudget("/api/car/request", queries=6, method="post", data=data)
+        self.assertTrue(response.json()["response"])
+
+    def request_data(self, start, end):
+        today = date.today()
+        return {
+            "car": self.car.pk, "first_name": "Guest", "last_name": "Test", "email": "guest@example.com",
+            "phone": "+996", "datefrom": today + timedelta(days=start), "dateto": today + timedelta(days=end),
+        }
+
+    def test_overlapping_request_rejected(self):
+        # The seeded booking holds today+10 .. today+14
+        for start, end in ((9, 10), (12, 13), (14, 20), (5, 30)):
+            with self.subTest(start=start, end=end):
+                serializer = CarRequestSerializer(data=self.request_data(start, end))
+                self.assertFalse(serializer.is_valid())
+                self.assertIn("car", serializer.errors)
+        for start, end in ((5, 9), (15, 16)):
+            with self.subTest(start=start, end=end):
+                serializer = CarRequestSerializer(data=self.request_data(start, end))
+                self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        CarRentalRequest.objects.filter(car=self.car).update(status=0)
+        serializer = CarRequestSerializer(data=self.request_data(12, 13))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_inverted_dates_rejected(self):
+        serializer = CarRequestSerializer(data=self.request_data(5, 3))
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("dateto", serializer.errors)
+
+        booking = CarRentalRequest(**{**self.request_data(5, 3), "car": self.car})
+        with self.assertRaises(ValidationError) as error:
+            booking.full_clean()
+        self.assertIn("dateto", error.exception.message_dict)
+
+    def test_calendar_of_both_cars_refreshed_when_request_moves(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "calendar"}}
+        other = Car.objects.filter(type=self.car_type).exclude(pk=self.car.pk).first()
+        with override_settings(CACHES=locmem):
+            self.assertEqual(len(availability_calendar(self.car.pk)["ranges"]), 1)
+            self.assertEqual(len(availability_calendar(other.pk)["ranges"]), 1)
+
+            booking = CarRentalRequest.objects.get(car=self.car)
+            booking.car = other
+            booking.datefrom += timedelta(days=30)
+            booking.dateto += timedelta(days=30)
+            booking.save()
+
+            self.assertEqual(availability_calendar(self.car.pk)["ranges"], [])
+            self.assertEqual(len(availability_calendar(other.pk)["ranges"]), 2)
+
+
+class AvailabilityCalendarTests(SimpleTestCase):
+    def test_merge_ranges(self):
+        ranges = [
+            (date(2026, 3, 10), date(2026, 3, 12)),
+            (date(2026, 3, 1), date(2026, 3, 3)),
+            (date(2026, 3, 4), date(2026, 3, 5)),  # back to back with the first
+            (date(2026, 3, 11), date(2026, 3, 20)),  # overlapping
+            (date(2026, 3, 22), date(2026, 3, 22)),
+        ]
+        self.assertEqual(
+            merge_ranges(ranges),
+            [
+                [date(2026, 3, 1), date(2026, 3, 5)],
+                [date(2026, 3, 10), date(2026, 3, 20)],
+                [date(2026, 3, 22), date(2026, 3, 22)],
+            ],
+        )
+        self.assertEqual(merge_ranges([]), [])
+
+    def test_month_bitmaps(self):
+        ranges = [[date(2026, 1, 1), date(2026, 1, 3)], [date(2026, 1, 30), date(2026, 2, 2)]]
+        self.assertEqual(month_bitmaps(ranges), {"2026-01": 0b111 | 0b11 << 29, "2026-02": 0b11})
+        # A booking spanning a whole month sets every day of it, 29 in a leap February
+        self.assertEqual(month_bitmaps([[date(2028, 2, 1), date(2028, 2, 29)]]), {"2028-02": (1 << 29) - 1})
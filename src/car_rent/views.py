@@ -1,26 +1,50 @@
 from rest_framework import generics, views
 from rest_framework.response import Response
-from django.db.models import Q
-from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Min, OuterRef, Subquery
+from django.db import transaction
 
+from .availability import free_between
+from .filters import CarFilter, CarOrderingFilter
 from .models import *
+from .pagination import CarListPagination
 from .serializers import *
 
+from src.base.conditional import ConditionalGetMixin
 from src.tg_bot.bot import send_car_request
-from asyncio import run
 
 
-class CarListAPIView(views.APIView):
+def with_listing_fields(queryset):
+    """Annotate the cheapest price and the first image, so a page of cars is a single query."""
+    cover = Images.objects.filter(car=OuterRef("pk")).order_by("id")
+    return queryset.select_related("brand").annotate(
+        min_price=Subquery(
+            Prices.objects.filter(car=OuterRef("pk")).order_by().values("car").annotate(m=Min("price")).values("m")
+        ),
+        cover_img=Subquery(cover.values("img")[:1]),
+        cover_alt=Subquery(cover.values("alt")[:1]),
+        cover_title=Subquery(cover.values("img_title")[:1]),
+    )
+
+
+class CarListAPIView(ConditionalGetMixin, generics.ListAPIView):
+    conditional_relations = ("car_prices", "car_images")
+    serializer_class = CarListSerializer
+    filter_backends = [CarOrderingFilter, CarFilter]
+    pagination_class = CarListPagination
+    ordering = CarListPagination.ordering
+
+    def get_queryset(self):
+        return with_listing_fields(Car.objects.exclude(status=0).filter(type_id=self.kwargs["type_id"]))
+
+
+class AvailableCarListAPIView(CarListAPIView):
+    conditional_relations = ("car_prices", "car_images", "carrentalrequest")
+
+    def get_queryset(self):
+        params = AvailabilityQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return free_between(super().get_queryset(), params.validated_data["start"], params.validated_data["end"])
 
-    def get(self, request, type_id):
-        try:
-            queryset = Car.objects.prefetch_related(
-                'car_images', 'car_prices', 'brand').exclude(status=0).filter(type_id=type_id)
-            serializer = CarListSerializer(queryset, many=True)
-            return Response(serializer.data)
-        except ObjectDoesNotExist:
-            return Response({"response": False})
-        
 
 class CarTypeListView(generics.ListAPIView):
     serializer_class = CarTypeSerializer
@@ -31,8 +55,9 @@ class CarTypeListView(generics.ListAPIView):
 
 
 
-class CarDetailAPIView(generics.RetrieveAPIView):
-    queryset = Car.objects.all()
+class CarDetailAPIView(ConditionalGetMixin, generics.RetrieveAPIView):
+    conditional_relations = ("car_prices", "car_images", "carrentalrequest")
+    queryset = Car.objects.select_related("brand", "type").prefetch_related("car_images__derivatives", "car_prices")
     serializer_class = CarDetailSerializer
 
 
@@ -44,8 +69,9 @@ class CarRequestAPIView(generics.CreateAPIView):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
-            msg = run(send_car_request(serializer.data))
+            with transaction.atomic():
+                serializer.save()
+                msg = send_car_request(serializer.data)
             if msg:
                 return Response({'response': True, 'message': 'Заявка успешно отправлено'})
             return Response({'response': False})
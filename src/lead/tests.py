@@ -1,3 +1,20 @@
-from django.test import TestCase
+from src.base.testing import EndpointBudgetTestCase
+from src.tours.models import Tour
 
-# Create your tests here.
+
+class LeadEndpointTests(EndpointBudgetTestCase):
+    def test_create_lead(self):
+        tour = Tour.objects.get(slug="tour-0-0-en")
+        data = {
+            "first_name": "Guest",
+            "last_name": "Test",
+            "email": "guest@example.com",
+            "phone": "+996",
+            "dateofborn": "1990-01-01",
+            "gender": "Мужской",
+            "nationality": "KG",
+            "tour": tour.pk,
+            "price": tour.prices.first().pk,
+        }
+        response = self.assertBudget("/api/lead/create", queries=7, method="post", data=data)
+        self.assertTrue(response.json()["response"])
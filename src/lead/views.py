@@ -1,4 +1,4 @@
-from asyncio import run
+from django.db import transaction
 from rest_framework import generics, status
 from rest_framework.response import Response
 
@@ -14,11 +14,12 @@ class CreateTravelerAPIView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            try:
-                msg = run(create_lead(lead=serializer.data, travelers=serializer.data['travelers']))
-            except KeyError:
-                msg = run(create_lead(lead=serializer))
+            with transaction.atomic():
+                serializer.save()
+                try:
+                    msg = create_lead(lead=serializer.data, travelers=serializer.data['travelers'])
+                except KeyError:
+                    msg = create_lead(lead=serializer)
             if msg:
                 return Response({"response": True})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
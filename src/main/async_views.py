@@ -0,0 +1,26 @@
+from django.db.models import prefetch_related_objects
+
+from src.base.aio import conditional, render_json, run_sync
+from src.base.counters import view_counter
+from .models import Articles
+from .serializers import ArticleDetailSerializer
+from .views import ArticleDetailView
+
+
+async def article_detail(request, slug):
+    async def build():
+        try:
+            article = await Articles.objects.aget(slug=slug)
+        except Articles.DoesNotExist:
+            return render_json({"response": False}, status=404)
+
+        view_counter.increment(Articles, article.pk)
+        article.views += 1
+
+        def serialize():
+            prefetch_related_objects([article], "derivatives", "art_images__derivatives")
+            return ArticleDetailSerializer(article, context={"request": request}).data
+
+        return render_json(await run_sync(serialize))
+
+    return await conditional(ArticleDetailView, request, {"slug": slug}, build)
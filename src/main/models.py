@@ -1,8 +1,11 @@
 from django.db import models
+from django.contrib.contenttypes.fields import GenericRelation
 from django.utils.translation import gettext_lazy as _
 from src.tours.models import Tour
 from ckeditor.fields import RichTextField
 from django_resized import ResizedImageField
+from src.base.images import invalidate_derivatives_on_change
+from src.media.pipeline import register as register_derivatives
 
 
 class Information(models.Model):
@@ -118,6 +121,7 @@ class SiteReviews(models.Model):
     class Meta:
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы клиентов"
+        indexes = [models.Index(fields=["status", "-id"], name="site_review_status_id")]
 
 
 class FAQ(models.Model):
@@ -189,7 +193,7 @@ class Transport(models.Model):
     rec = models.ForeignKey(
         "CreateOwnTourRec", on_delete=models.CASCADE, related_name="transport"
     )
-    name = models.CharField(_("Название"))
+    name = models.CharField(_("Название"), max_length=255)
 
     def __str__(self) -> str:
         return self.name
@@ -223,7 +227,7 @@ class CreateOwnTourRec(models.Model):
         ("jp", "Японский"),
     )
     
-    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en", unique=2)
+    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en", max_length=2, unique=2)
 
     def __str__(self) -> str:
         return f"Настройки создания тура ({self.lang})"
@@ -296,8 +300,10 @@ class ArticleCats(models.Model):
 class ArticleImages(models.Model):
     article = models.ForeignKey("Articles", on_delete=models.CASCADE, related_name="art_images")
     img = ResizedImageField(_("Изображение"), upload_to="articles", force_format="WEBP", quality=50)
-    alt = models.CharField(null=True, blank=True)
-    img_title = models.CharField(null=True, blank=True)
+    alt = models.CharField(max_length=255, null=True, blank=True)
+    img_title = models.CharField(max_length=255, null=True, blank=True)
+    derivatives = GenericRelation("media.ImageDerivative")
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
     
     def __str__(self) -> str:
         return ""
@@ -324,8 +330,9 @@ class Articles(models.Model):
     short_desc = RichTextField(_("Краткое описание"))
     full_desc = RichTextField(_("Полное описание"))
     poster = ResizedImageField(_("Постер"), upload_to="article_posters", null=True, blank=True, force_format="WEBP", quality=50)
-    alt = models.CharField(null=True, blank=True)
-    img_title = models.CharField(null=True, blank=True)
+    alt = models.CharField(max_length=255, null=True, blank=True)
+    img_title = models.CharField(max_length=255, null=True, blank=True)
+    derivatives = GenericRelation("media.ImageDerivative")
     link = models.URLField(_("Ссылка"), null=True, blank=True)
     created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
     views = models.IntegerField(_("Просмотры"), default=1)
@@ -357,7 +364,7 @@ class Gallery(models.Model):
         ("jp", "Японский"),
     )
     
-    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en")
+    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en", max_length=2)
     name = models.CharField(_("Название"), max_length=255, null=True, blank=True)
     youtube_link = models.URLField(_("Ссылка на ютуб"), null=True, blank=True)
     # poster = models.ImageField(_(""), upload_to='test', default='default_profile_photo.png')
@@ -379,9 +386,11 @@ class GalleryImages(models.Model):
     gallery = models.ForeignKey(Gallery, on_delete=models.CASCADE, related_name="gallery_images")
     name = models.CharField(_("Описание"), max_length=255, null=True, blank=True)
     img = ResizedImageField(_("Изображение"), upload_to="gallery", force_format="WEBP", quality=50)
-    alt = models.CharField(null=True, blank=True)
-    img_title = models.CharField(null=True, blank=True)
+    alt = models.CharField(max_length=255, null=True, blank=True)
+    img_title = models.CharField(max_length=255, null=True, blank=True)
+    derivatives = GenericRelation("media.ImageDerivative")
     created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
     
     def __str__(self) -> str:
         if self.name:
@@ -391,3 +400,10 @@ class GalleryImages(models.Model):
     class Meta:
         verbose_name = _("Галерея")
         verbose_name_plural = _("Галерея")
+
+
+invalidate_derivatives_on_change(Articles, "poster")
+
+register_derivatives(Articles, "poster")
+register_derivatives(ArticleImages, "img")
+register_derivatives(GalleryImages, "img")
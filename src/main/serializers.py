@@ -17,6 +17,7 @@ from .models import (
     GalleryImages,
 )
 from src.tours.models import Tour, Category
+from src.media.serializers import SrcsetField
 
 
 class SendCreateRequestSerializer(serializers.ModelSerializer):
@@ -152,10 +153,11 @@ class ArticleNavSerializer(serializers.ModelSerializer):
 
 class ArticleImagesSerializer(serializers.ModelSerializer):
     img = serializers.SerializerMethodField()
+    srcset = SrcsetField()
 
     class Meta:
         model = ArticleImages
-        fields = ["img", "alt", "img_title"]
+        fields = ["img", "srcset", "alt", "img_title"]
 
     def get_img(self, obj):
         request = self.context.get("request")
@@ -166,6 +168,7 @@ class ArticleImagesSerializer(serializers.ModelSerializer):
 
 class ArticleListSerializer(serializers.ModelSerializer):
     poster = serializers.SerializerMethodField()
+    poster_srcset = SrcsetField()
 
     class Meta:
         model = Articles
@@ -176,6 +179,7 @@ class ArticleListSerializer(serializers.ModelSerializer):
             "short_desc",
             "full_desc",
             "poster",
+            "poster_srcset",
             "alt",
             "img_title"
         ]
@@ -210,6 +214,7 @@ class ArticleCatsMainSerializer(serializers.ModelSerializer):
 
 class ArticleDetailSerializer(serializers.ModelSerializer):
     art_images = ArticleImagesSerializer(many=True)
+    poster_srcset = SrcsetField()
     created_at = serializers.SerializerMethodField()
 
     class Meta:
@@ -221,6 +226,7 @@ class ArticleDetailSerializer(serializers.ModelSerializer):
             "short_desc",
             "full_desc",
             "poster",
+            "poster_srcset",
             "alt",
             "img_title",
             "link",
@@ -241,10 +247,11 @@ class RightbarCategorySerializer(serializers.ModelSerializer):
 
 class GalleryImagesSerializer(serializers.ModelSerializer):
     img = serializers.SerializerMethodField()
+    srcset = SrcsetField()
 
     class Meta:
         model = GalleryImages
-        fields = ["id", "name", "img", "alt", "img_title", "created_at"]
+        fields = ["id", "name", "img", "srcset", "alt", "img_title", "created_at"]
 
     def get_img(self, obj):
         if obj.img:
@@ -0,0 +1,146 @@
+import gzip
+import math
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from src.tours.models import Tour, Category
+from .models import Articles, ArticleCats
+
+SITE_URL = "https://nomadslife.travel"
+LANGS = ("ru", "en", "de", "fr", "es", "jp")
+URL_LIMIT = 50000
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+PAGES = (
+    ("", "daily"),
+    ("/cuaranteed-tours", "daily"),
+    ("/create-tours", "weekly"),
+    ("/gallery", "daily"),
+    ("/rent-car", "daily"),
+    ("/about-the-company", "weekly"),
+    ("/booking-terms", "weekly"),
+    ("/privacy-policy", "weekly"),
+)
+
+# section -> (model, path prefix of its pages on the site)
+SECTIONS = {
+    "articles": (Articles, "article-list"),
+    "article-categories": (ArticleCats, "article"),
+    "tours": (Tour, "cuaranteed-tours"),
+    "categories": (Category, "categories"),
+}
+
+
+class SitemapPage:
+    def __init__(self, section, lang, page, count, last_mod):
+        self.section = section
+        self.lang = lang
+        self.page = page
+        self.count = count
+        self.last_mod = last_mod
+
+    @property
+    def cache_key(self):
+        stamp = self.last_mod.timestamp() if self.last_mod else 0
+        return f"sitemap:{self.section}:{self.lang}:{self.page}:{self.count}:{stamp}"
+
+
+def changed_at(name, fingerprint, last_mod):
+    """
+    ``last_mod``, or when ``fingerprint`` was first seen to change if that is later.
+
+    Deleted rows leave no ``last_mod`` behind; remembering when the row counts
+    in the fingerprint moved lets ``If-Modified-Since`` see a deletion too.
+    """
+    key = f"sitemap-changed:{name}"
+    seen = cache.get(key)
+    if seen is None or seen[0] != fingerprint:
+        seen = (fingerprint, timezone.now() if seen is not None else None)
+        cache.set(key, seen, None)
+    return max(filter(None, (last_mod, seen[1])), default=None)
+
+
+def get_pages():
+    """
+    List every child sitemap with its row count and newest ``last_mod``.
+
+    Costs one aggregate query per section; the result doubles as the
+    freshness stamp of the cached child sitemaps.
+    """
+    pages = [SitemapPage("pages", lang, 1, len(PAGES), None) for lang in LANGS]
+    for section, (model, _) in SECTIONS.items():
+        stats = model.objects.order_by().values("lang").annotate(count=Count("id"), last_mod=Max("last_mod"))
+        for row in stats:
+            for page in range(1, math.ceil(row["count"] / URL_LIMIT) + 1):
+                pages.append(SitemapPage(section, row["lang"], page, row["count"], row["last_mod"]))
+    return pages
+
+
+def get_page(section, lang, page):
+    if section == "pages":
+        return SitemapPage(section, lang, 1, len(PAGES), None) if lang in LANGS and page == 1 else None
+    if section not in SECTIONS:
+        return None
+    model = SECTIONS[section][0]
+    stats = model.objects.filter(lang=lang).aggregate(count=Count("id"), last_mod=Max("last_mod"))
+    if not 1 <= page <= math.ceil(stats["count"] / URL_LIMIT):
+        return None
+    return SitemapPage(section, lang, page, stats["count"], stats["last_mod"])
+
+
+def _write_urlset(out, urls):
+    out.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write(b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    for loc, changefreq, last_mod in urls:
+        out.write(f"<url><loc>{escape(loc)}</loc><changefreq>{changefreq}</changefreq>".encode())
+        if last_mod:
+            out.write(f"<lastmod>{last_mod.isoformat()}</lastmod>".encode())
+        out.write(b"<priority>1.0</priority></url>\n")
+    out.write(b"</urlset>\n")
+
+
+def _iter_urls(sitemap_page):
+    if sitemap_page.section == "pages":
+        for path, changefreq in PAGES:
+            yield f"{SITE_URL}/{sitemap_page.lang}{path}", changefreq, None
+        return
+
+    model, prefix = SECTIONS[sitemap_page.section]
+    offset = (sitemap_page.page - 1) * URL_LIMIT
+    rows = (
+        model.objects.filter(lang=sitemap_page.lang)
+        .order_by("id")
+        .values_list("slug", "last_mod")[offset:offset + URL_LIMIT]
+    )
+    for slug, last_mod in rows.iterator(chunk_size=2000):
+        yield f"{SITE_URL}/{sitemap_page.lang}/{prefix}/{slug}", "daily", last_mod
+
+
+def render_page(sitemap_page):
+    """Return the gzip'd child sitemap, building it only when its stamp changed."""
+    content = cache.get(sitemap_page.cache_key)
+    if content is None:
+        buffer = BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as out:
+            _write_urlset(out, _iter_urls(sitemap_page))
+        content = buffer.getvalue()
+        cache.set(sitemap_page.cache_key, content, CACHE_TIMEOUT)
+    return content
+
+
+def render_index(pages, build_url):
+    buffer = BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as out:
+        out.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write(b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for page in pages:
+            out.write(f"<sitemap><loc>{escape(build_url(page))}</loc>".encode())
+            if page.last_mod:
+                out.write(f"<lastmod>{page.last_mod.isoformat()}</lastmod>".encode())
+            out.write(b"</sitemap>\n")
+        out.write(b"</sitemapindex>\n")
+    return buffer.getvalue()
@@ -1,3 +1,168 @@
-from django.test import TestCase
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.test import override_settings
+
+from src.base import timing
+from src.base.metrics import registry
+from src.base.testing import EndpointBudgetTestCase
+from .models import FAQ, Articles, Gallery
+
+
+class MainEndpointTests(EndpointBudgetTestCase):
+    def test_site_reviews(self):
+        response = self.assertBudget("/api/main/site-review-list", queries=1)
+        self.assertEqual(len(response.json()["results"]), 4)
+
+    def test_faq(self):
+        self.assertBudget("/api/en/main/faq", queries=2)
+
+    def test_faq_cache_evicted_after_commit(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "faq"}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual(self.client.get("/api/en/main/faq")["X-Cache"], "MISS")
+            self.assertEqual(self.client.get("/api/ru/main/faq")["X-Cache"], "MISS")
+            self.assertEqual(self.assertBudget("/api/en/main/faq", queries=0)["X-Cache"], "HIT")
+            # Parameters the view ignores and Accept details share the entry; its search does not
+            response = self.client.get("/api/en/main/faq?utm_source=x", HTTP_ACCEPT="application/json, */*;q=0.8")
+            self.assertEqual(response["X-Cache"], "HIT")
+            self.assertEqual(self.client.get("/api/en/main/faq?search=Q")["X-Cache"], "MISS")
+
+            faq = FAQ.objects.get(lang="en")
+            faq.name = "Renamed"
+            with self.captureOnCommitCallbacks(execute=True):
+                faq.save()
+                # Until the change commits, other requests must not cache it under a new version
+                self.assertEqual(self.client.get("/api/en/main/faq")["X-Cache"], "HIT")
+
+            response = self.client.get("/api/en/main/faq")
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertEqual(response.json()[0]["name"], "Renamed")
+            self.assertEqual(self.client.get("/api/ru/main/faq")["X-Cache"], "HIT")
+
+    def test_create_tour_params(self):
+        self.assertBudget("/api/en/main/params", queries=5)
+
+    def test_article_nav(self):
+        self.assertBudget("/api/en/article/nav", queries=2)
+
+    def test_article_list(self):
+        self.assertBudget("/api/article/list/articles-en", queries=3)
+
+    def test_article_detail(self):
+        self.assertBudget("/api/article/detail/article-0-en", queries=5)
+
+    def test_articles(self):
+        self.assertBudget("/api/en/main/articles", queries=2)
+
+    def test_gallery_list(self):
+        self.assertBudget("/api/en/gallery/list", queries=3)
+
+    def test_gallery_detail(self):
+        gallery = Gallery.objects.get(lang="en")
+        self.assertBudget(f"/api/gallery/detail/{gallery.pk}", queries=4)
+
+    def test_compressed_article_image(self):
+        article = Articles.objects.get(slug="article-0-en")
+        self.assertBudget(f"/api/compressed-article-image/{article.pk}", queries=1)
+
+    def test_sitemap_index(self):
+        self.assertBudget("/api/sitemap.xml", queries=4)
+
+    def test_sitemap_section(self):
+        self.assertBudget("/api/sitemap/en/tours-1.xml", queries=2)
+
+    def test_sitemap_not_modified_until_a_url_is_deleted(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "sitemap"}}
+        Articles.objects.update(last_mod=datetime.now(timezone.utc) - timedelta(days=1))
+        with override_settings(CACHES=locmem):
+            response = self.client.get("/api/sitemap/en/articles-1.xml")
+            etag, last_modified = response["ETag"], response["Last-Modified"]
+            self.assertBudget("/api/sitemap/en/articles-1.xml", queries=1, status=304, HTTP_IF_NONE_MATCH=etag)
+            self.assertBudget(
+                "/api/sitemap/en/articles-1.xml", queries=1, status=304, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+
+            # Deleting the oldest row leaves the newest last_mod where it was
+            Articles.objects.filter(lang="en").order_by("last_mod").first().delete()
+            self.assertBudget("/api/sitemap/en/articles-1.xml", queries=2, HTTP_IF_NONE_MATCH=etag)
+            self.assertBudget("/api/sitemap/en/articles-1.xml", queries=1, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    def test_send_request(self):
+        data = {
+            "full_name": "Guest",
+            "email": "guest@example.com",
+            "phone": "+996",
+            "size": 2,
+            "budget": "500-1000",
+            "message": "Hi",
+        }
+        response = self.assertBudget("/api/main/send-requests", queries=4, method="post", data=data)
+        self.assertTrue(response.json()["response"])
+
+    def test_create_site_review(self):
+        data = {"firstname": "Guest", "mark": 5, "text": "Great"}
+        response = self.assertBudget("/api/main/site-review-create", queries=4, method="post", data=data)
+        self.assertTrue(response.json()["response"])
+
+    def test_create_your_tour(self):
+        today = date.today()
+        data = {
+            "full_name": "Guest",
+            "phone": "+996",
+            "email": "guest@example.com",
+            "cats": ["Trekking"],
+            "accommodation": ["Yurt"],
+            "transport": "Car",
+            "meal": "Full",
+            "people": 2,
+            "comment": "Hi",
+            "datefrom": str(today + timedelta(days=30)),
+            "dateto": str(today + timedelta(days=35)),
+        }
+        response = self.assertBudget("/api/main/create-your-tour", queries=4, method="post", data=data)
+        self.assertTrue(response.json()["response"])
+
+    @override_settings(METRICS_TOKEN="scrape")
+    def test_metrics(self):
+        self.assertBudget("/api/metrics/", queries=0, status=404)
+        self.client.get("/api/en/main/faq")
+        response = self.assertBudget("/api/metrics/", queries=0, HTTP_AUTHORIZATION="Bearer scrape")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        self.assertIn('http_responses_total{method="GET",status="200",view="faq"}', response.content.decode())
+
+    def test_queries_counted_on_every_request_and_timed_on_a_sample(self):
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=0), mock.patch.object(registry, "observe") as observe, \
+                mock.patch("src.base.timing.begin", wraps=timing.begin) as begin:
+            response = self.client.get("/api/en/main/faq")
+        self.assertNotIn("Server-Timing", response)
+        begin.assert_not_called()
+        observe.assert_any_call("http_request_db_queries", 2, {"view": "faq"})
+
+        self.client = self.client_class()
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=1):
+            response = self.client.get("/api/en/main/faq")
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+
+    def test_metrics_keep_counts_of_retired_workers(self):
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        exited = 2 ** 22 + 1  # above any pid_max
+        snapshot = {"values": {'["worker_test", []]': 3}, "histograms": {}, "gauges": {'["worker_test_gauge", []]': 1}}
+        # An exited worker, and an earlier process whose PID this one reuses
+        for name in (f"{exited}-1.json", f"{os.getpid()}-1.json"):
+            with open(os.path.join(settings.METRICS_DIR, name), "w") as f:
+                json.dump(snapshot, f)
+
+        values, _, gauges = registry.collect()
+        self.assertEqual(values['["worker_test", []]'], 6)
+        self.assertNotIn('["worker_test_gauge", []]', gauges)
+
+        with override_settings(METRICS_RETENTION=-1):
+            values, _, _ = registry.collect()
+            values_again, _, _ = registry.collect()
+        self.assertEqual(values['["worker_test", []]'], 6)
+        self.assertEqual(values_again['["worker_test", []]'], 6)
+        self.assertFalse(os.path.exists(os.path.join(settings.METRICS_DIR, f"{exited}-1.json")))
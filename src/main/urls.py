@@ -12,7 +12,8 @@ from .views import (
     ArticlesListAPIView,
     GalleryListView,
     GalleryFilterView,
-    SitemapView,
+    SitemapIndexView,
+    SitemapSectionView,
     CompressedArticleImageView
 )
 
@@ -34,5 +35,6 @@ urlpatterns = [
 
 
     # Sitemap
-    path("sitemap.xml", SitemapView.as_view(), name="sitemap")
+    path("sitemap.xml", SitemapIndexView.as_view(), name="sitemap"),
+    path("sitemap/<str:lang>/<str:section>-<int:page>.xml", SitemapSectionView.as_view(), name="sitemap-section"),
 ]
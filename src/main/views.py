@@ -1,12 +1,16 @@
-from PIL import Image
-from io import BytesIO
+import gzip
+import hashlib
 from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.filters import SearchFilter
 from rest_framework.views import APIView
-from django.http import FileResponse
 from django.core.exceptions import ObjectDoesNotExist
-from django.views.generic import TemplateView
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views import View
 from .serializers import (
     SendCreateRequestSerializer,
     SiteReviewSerializer,
@@ -31,14 +35,18 @@ from .models import (
     SiteReviews,
     CreateOwnTourRec,
     FAQ,
+    Answer,
     Gallery,
     GalleryImages,
 )
 
-from src.tours.models import Tour, Category
 from src.tg_bot.bot import send_request, new_site_review, create_own_tour
 from src.base.pagination import ReviewsListPagination
-from asyncio import run
+from src.base.cache import CachedViewMixin
+from src.base.conditional import ConditionalGetMixin
+from src.base.counters import view_counter
+from src.base.views import CompressedImageView
+from . import sitemaps
 
 
 class SendCreateRequestAPIView(generics.CreateAPIView):
@@ -49,8 +57,9 @@ class SendCreateRequestAPIView(generics.CreateAPIView):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
-            msg = run(send_request(serializer.data))
+            with transaction.atomic():
+                serializer.save()
+                msg = send_request(serializer.data)
             if msg:
                 return Response({"response": True}, status=status.HTTP_200_OK)
             return Response({"response": False})
@@ -74,15 +83,18 @@ class SiteReviewsCreateAPIView(generics.CreateAPIView):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
-            msg = run(new_site_review(serializer.data))
+            with transaction.atomic():
+                serializer.save()
+                msg = new_site_review(serializer.data)
             if msg:
                 return Response({"response": True})
             return Response({"response": False})
         return Response({"response": False, "error": serializer.errors})
 
 
-class FAQAPIView(generics.ListAPIView):
+class FAQAPIView(CachedViewMixin, generics.ListAPIView):
+    cache_dependencies = (FAQ, Answer)
+    cache_query_params = ("search",)
     serializer_class = FAQSerializer
     queryset = FAQ.objects.prefetch_related("faq")
     search_fields = ["name", "faq__question"]
@@ -112,15 +124,18 @@ class CreateYourTourAPIView(generics.CreateAPIView):
         accommodation = ", ".join(request.data.get("accommodation", []))
 
         if serializer.is_valid():
-            serializer.save()
-            msg = run(create_own_tour(serializer.data, cats, accommodation))
+            with transaction.atomic():
+                serializer.save()
+                msg = create_own_tour(serializer.data, cats, accommodation)
             if msg:
                 return Response({"response": True})
             return Response({"response": False})
         return Response(serializer.errors)
 
 
-class ArticleNavView(APIView):
+class ArticleNavView(CachedViewMixin, APIView):
+    cache_dependencies = (ArticleCats,)
+
     def get(self, request, lang_code):
         queryset = ArticleCats.objects.filter(lang=lang_code).prefetch_related("articles")
         serializer = ArticleNavSerializer(queryset, many=True)
@@ -128,21 +143,30 @@ class ArticleNavView(APIView):
         return Response(serializer.data)
 
 
-class ArticleListView(generics.ListAPIView):
+class ArticleListView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = ArticleListSerializer
 
     def get_queryset(self):
-        return Articles.objects.filter(cat__slug=self.kwargs["slug"])
+        return Articles.objects.filter(cat__slug=self.kwargs["slug"]).prefetch_related("derivatives")
+
+
+class ArticleDetailView(ConditionalGetMixin, APIView):
+    conditional_relations = ("art_images",)
 
+    def get_conditional_queryset(self):
+        return Articles.objects.filter(slug=self.kwargs["slug"])
+
+    def not_modified(self, validator):
+        view_counter.increment(Articles, validator["object_id"])
 
-class ArticleDetailView(APIView):
     def get(self, request, slug):
         try:
-            queryset = Articles.objects.get(slug=slug)
-            serializer = ArticleDetailSerializer(queryset, context={"request": request})
-
+            queryset = Articles.objects.prefetch_related(
+                "derivatives", "art_images__derivatives"
+            ).get(slug=slug)
+            view_counter.increment(Articles, queryset.pk)
             queryset.views += 1
-            queryset.save()
+            serializer = ArticleDetailSerializer(queryset, context={"request": request})
 
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -161,7 +185,12 @@ class ArticlesListAPIView(APIView):
         )
 
 
-class GalleryListView(APIView):
+class GalleryListView(ConditionalGetMixin, APIView):
+    conditional_relations = ("gallery_images",)
+
+    def get_conditional_queryset(self):
+        return Gallery.objects.filter(lang=self.kwargs["lang_code"])
+
     def get(self, request, lang_code):
         queryset = Gallery.objects.filter(lang=lang_code)
         serializer = GalleryListAPIViewSerializer(queryset, many=True)
@@ -169,10 +198,15 @@ class GalleryListView(APIView):
         return Response(serializer.data)
 
 
-class GalleryFilterView(APIView):
+class GalleryFilterView(ConditionalGetMixin, APIView):
+    conditional_relations = ("gallery_images",)
+
+    def get_conditional_queryset(self):
+        return Gallery.objects.filter(id=self.kwargs["gallery_id"])
+
     def get(self, request, gallery_id):
         try:
-            queryset = Gallery.objects.get(id=gallery_id)
+            queryset = Gallery.objects.prefetch_related("gallery_images__derivatives").get(id=gallery_id)
             serializer = GalleryFilterSerializer(queryset)
 
             return Response(serializer.data)
@@ -182,41 +216,59 @@ class GalleryFilterView(APIView):
             )
 
 
-class SitemapView(TemplateView):
-    template_name = "sitemapxml.html"
-    content_type = "application/xml"
-
-    def get_context_data(self, **kwargs):
-        context =  super().get_context_data(**kwargs)
-        context["articles"] = Articles.objects.order_by("last_mod")
-        context["article_cats"] = ArticleCats.objects.order_by("last_mod")
-        context["tours"] = Tour.objects.order_by("last_mod")
-        context["tour_cats"] = Category.objects.order_by("last_mod")
-        context["languages"] = {
-            "en",
-            "ru",
-            "de",
-            "fr",
-            "es",
-            "jp",
-        }
-        return context
-    
+class SitemapMixin:
+    def sitemap_response(self, request, name, fingerprint, last_mod, render):
+        # The fingerprint holds the row counts next to last_mod, so deletions change both validators
+        last_mod = sitemaps.changed_at(name, fingerprint, last_mod)
+        timestamp = int(last_mod.timestamp()) if last_mod else None
+        encoded = "gzip" in request.headers.get("Accept-Encoding", "")
+        etag = f'"{hashlib.md5(fingerprint.encode()).hexdigest()}{"-gzip" if encoded else ""}"'
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            content = render()
+            if encoded:
+                response = HttpResponse(content, content_type="application/xml")
+                response["Content-Encoding"] = "gzip"
+            else:
+                response = HttpResponse(gzip.decompress(content), content_type="application/xml")
+        response["ETag"] = etag
+        if timestamp:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
 
-class CompressedArticleImageView(APIView):
-    def get(self, request, article_id):
-        obj = generics.get_object_or_404(Articles, id=article_id)
-        compressed_image = self.compress_image(obj.poster)
 
-        response = FileResponse(compressed_image, content_type='image/webp')
-        return response
+class SitemapIndexView(SitemapMixin, View):
+    def get(self, request):
+        pages = sitemaps.get_pages()
+        last_mod = max((page.last_mod for page in pages if page.last_mod), default=None)
+
+        def build_url(page):
+            return request.build_absolute_uri(reverse("sitemap-section", args=[page.lang, page.section, page.page]))
 
-    def compress_image(self, image):
-        img = Image.open(image.path)
+        def render():
+            return sitemaps.render_index(pages, build_url)
+
+        fingerprint = "|".join(page.cache_key for page in pages)
+        return self.sitemap_response(request, "index", fingerprint, last_mod, render)
+
+
+class SitemapSectionView(SitemapMixin, View):
+    def get(self, request, lang, section, page):
+        sitemap_page = sitemaps.get_page(section, lang, page)
+        if sitemap_page is None:
+            raise Http404
+        return self.sitemap_response(
+            request,
+            f"{section}:{lang}:{page}",
+            sitemap_page.cache_key,
+            sitemap_page.last_mod,
+            lambda: sitemaps.render_page(sitemap_page),
+        )
 
-        img.thumbnail((500, 500))
-        output = BytesIO()
-        img.save(output, format='WEBP', quality=50)
-        output.seek(0)
 
-        return output
\ No newline at end of file
+class CompressedArticleImageView(CompressedImageView):
+    model = Articles
+    image_field = "poster"
+    lookup_url_kwarg = "article_id"
+    size = (500, 500)
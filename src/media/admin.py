@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils.safestring import mark_safe
+from .models import ImageDerivative
+
+
+@admin.register(ImageDerivative)
+class ImageDerivativeAdmin(admin.ModelAdmin):
+    list_display = ("id", "source", "width", "height", "size", "get_html_img")
+    list_display_links = ("id", "source")
+    list_filter = ("content_type", "width")
+    search_fields = ("source",)
+
+    def get_html_img(self, object):
+        if object.img:
+            return mark_safe(f"<img src='{object.img.url}' height='60'>")
+
+    get_html_img.short_description = "Изображение"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from src.media.pipeline import generate_derivatives, registry
+
+
+class Command(BaseCommand):
+    help = "Generate responsive width derivatives for every registered image field"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate derivatives that are already up to date")
+
+    def handle(self, *args, **options):
+        for model, field_name in registry:
+            count = 0
+            queryset = model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+            for instance in queryset.iterator():
+                try:
+                    generate_derivatives(instance, field_name, force=options["force"])
+                except (OSError, ValueError) as e:
+                    self.stderr.write(f"{model._meta.label} {instance.pk}: {e}")
+                    continue
+                count += 1
+            self.stdout.write(f"{model._meta.label}.{field_name}: {count} images")
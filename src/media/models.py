@@ -0,0 +1,38 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+
+class ImageDerivative(models.Model):
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+    field = models.CharField(_("Поле"), max_length=50)
+    source = models.CharField(_("Оригинал"), max_length=255)
+    img = models.ImageField(_("Изображение"), upload_to="derivatives", max_length=255)
+    width = models.PositiveIntegerField(_("Ширина"))
+    height = models.PositiveIntegerField(_("Высота"))
+    size = models.PositiveIntegerField(_("Размер (байт)"))
+    created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.width}w)"
+
+    class Meta:
+        verbose_name = _("Производное изображение")
+        verbose_name_plural = _("Производные изображения")
+        indexes = [models.Index(fields=["content_type", "object_id", "field"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "field", "width"], name="unique_image_derivative_width"
+            )
+        ]
+
+
+@receiver(post_delete, sender=ImageDerivative)
+def delete_derivative_file(sender, instance, **kwargs):
+    if instance.img:
+        instance.img.delete(save=False)
@@ -0,0 +1,72 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save
+
+from .models import ImageDerivative
+
+registry = []
+
+
+def generate_derivatives(instance, field_name, force=False):
+    field_file = getattr(instance, field_name)
+    content_type = ContentType.objects.get_for_model(instance)
+    existing = ImageDerivative.objects.filter(
+        content_type=content_type, object_id=instance.pk, field=field_name
+    )
+
+    if not field_file:
+        for derivative in existing:
+            derivative.delete()
+        return []
+
+    if not force and existing.filter(source=field_file.name).exists():
+        return list(existing)
+
+    for derivative in existing:
+        derivative.delete()
+
+    from PIL import Image
+
+    with field_file.open("rb") as f:
+        original = Image.open(f)
+        original.load()
+
+    widths = [w for w in settings.IMAGE_DERIVATIVE_WIDTHS if w < original.width]
+    if original.width <= max(settings.IMAGE_DERIVATIVE_WIDTHS):
+        widths.append(original.width)
+
+    stem = os.path.splitext(field_file.name)[0]
+    derivatives = []
+    for width in widths:
+        img = original.copy()
+        img.thumbnail((width, original.height))
+        output = BytesIO()
+        img.save(output, format="WEBP", quality=settings.IMAGE_DERIVATIVE_QUALITY)
+
+        derivative = ImageDerivative(
+            content_type=content_type,
+            object_id=instance.pk,
+            field=field_name,
+            source=field_file.name,
+            width=img.width,
+            height=img.height,
+            size=output.tell(),
+        )
+        derivative.img.save(f"{stem}-{img.width}w.webp", ContentFile(output.getvalue()), save=False)
+        derivative.save()
+        derivatives.append(derivative)
+
+    return derivatives
+
+
+def register(model, field_name):
+    def on_post_save(sender, instance, raw=False, **kwargs):
+        if not raw:
+            generate_derivatives(instance, field_name)
+
+    post_save.connect(on_post_save, sender=model, weak=False, dispatch_uid=f"pipeline:{model._meta.label}.{field_name}")
+    registry.append((model, field_name))
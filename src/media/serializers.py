@@ -0,0 +1,13 @@
+from rest_framework import serializers
+
+SITE_URL = "https://nomadslife.travel"
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "derivatives")
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        derivatives = sorted(value.all(), key=lambda d: d.width)
+        return [{"src": f"{SITE_URL}{d.img.url}", "width": d.width} for d in derivatives]
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "attempts", "created_at", "sent_at", "latency_ms", "send_duration_ms")
+    list_display_links = ("id",)
+    list_filter = ("status",)
+    readonly_fields = ("created_at", "next_attempt_at", "sent_at", "send_duration_ms", "latency_ms", "last_error")
+    actions = ["requeue"]
+
+    @admin.action(description="Отправить повторно")
+    def requeue(self, request, queryset):
+        queryset.exclude(status=2).update(status=1, attempts=0, next_attempt_at=timezone.now())
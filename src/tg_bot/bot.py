@@ -1,15 +1,32 @@
 import os
 from datetime import datetime
-from aiogram import Bot, Dispatcher, types, executor
 
 TOKEN = os.getenv("TOKEN")
 CHAT_ID = os.getenv("CHAT_ID")
 
-bot = Bot(token=TOKEN, parse_mode=types.ParseMode.HTML)
-dp = Dispatcher(bot)
+_bot = None
 
 
-async def format_date(date):
+def get_bot():
+    # Views only enqueue, so aiogram (and aiohttp under it) is imported by the
+    # processes that actually talk to Telegram, not by every web worker
+    global _bot
+    if _bot is None:
+        from aiogram import Bot, types
+
+        _bot = Bot(token=TOKEN, parse_mode=types.ParseMode.HTML)
+    return _bot
+
+
+def enqueue(msg):
+    # Delivered by the deliver_notifications worker; callers wrap this in the
+    # same transaction as the save that triggered it
+    from .models import Notification
+
+    Notification.objects.create(chat_id=CHAT_ID, text=msg)
+
+
+def format_date(date):
     date = datetime.strptime(date, "%Y-%m-%d")
 
     formatted_date = date.strftime("%d %B %Y г.")
@@ -17,7 +34,7 @@ async def format_date(date):
     return formatted_date
 
 
-async def format_date_1(date):
+def format_date_1(date):
     date = datetime.strptime(date, "%Y-%m-%d")
 
     formatted_date = date.strftime("%-d-%B")
@@ -25,7 +42,7 @@ async def format_date_1(date):
     return formatted_date
 
 
-async def formate_date_2(date):
+def formate_date_2(date):
     date = datetime.strptime(date, "%Y-%m-%d")
 
     formated_date = date.strftime("%d.%m.%Y")
@@ -33,7 +50,7 @@ async def formate_date_2(date):
     return formated_date
 
 
-async def send_feedback(data):
+def send_feedback(data):
     if len(data) >= 1:
         msg = (
             f"<b>Новый запрос на обратную связь!!!</b> \n\n"
@@ -42,12 +59,12 @@ async def send_feedback(data):
             f"Телефон: <b>{data['phone']}</b> \n"
             f"Коментарий: {data['comment']}"
         )
-        await bot.send_message(CHAT_ID, msg)
+        enqueue(msg)
         return True
     return False
 
 
-async def send_request(data):
+def send_request(data):
     if data:
         budget = data["budget"].split("-")
         msg = (
@@ -59,12 +76,12 @@ async def send_request(data):
             f"Бюджет на человека: ${budget[0]} - ${budget[1]}\n"
             f"Коментарий: {data['message']}"
         )
-        await bot.send_message(CHAT_ID, msg)
+        enqueue(msg)
         return True
     return False
 
 
-async def new_site_review(data):
+def new_site_review(data):
     if data:
         msg = (
             f"<b>Новый отзыв на сайте!!!</b> \n\n"
@@ -72,28 +89,28 @@ async def new_site_review(data):
             f"Оценка: <b>{data['mark']} из 5</b> \n"
             f"Коментарий: {data['text']}"
         )
-        await bot.send_message(CHAT_ID, msg)
+        enqueue(msg)
         return True
     return False
 
 
-async def send_car_request(data):
+def send_car_request(data):
     if data:
         msg = (
             f"Заявка на авто: <b>{data['model']}</b> \n"
-            f"Дата начала: <b>{await format_date_1(data['datefrom'])}</b> \n"
-            f"Дата окончания: <b>{await format_date_1(data['dateto'])}</b> \n"
+            f"Дата начала: <b>{format_date_1(data['datefrom'])}</b> \n"
+            f"Дата окончания: <b>{format_date_1(data['dateto'])}</b> \n"
             f"ФИО: <b>{data['first_name']} {data['last_name']}</b> \n"
             f"Электронная почта: <b>{data['email']}</b> \n"
             f"Номер телефона: <b>{data['phone']}</b> \n"
             f"Комментарии и дополнительная информация: <b>{data['comment']}</b> \n"
         )
-        await bot.send_message(CHAT_ID, msg)
+        enqueue(msg)
         return True
     return False
 
 
-async def send_tour_review(data):
+def send_tour_review(data):
     if data:
         msg = (
             f"<b>Новый отзыв на тур {data['tour_title']}!!!</b> \n\n"
@@ -102,12 +119,12 @@ async def send_tour_review(data):
             f"Оценка: <b>{int(float(data['rating']))} из 5</b> \n"
             f"Коментарий: {data['comment']}"
         )
-        await bot.send_message(CHAT_ID, msg)
+        enqueue(msg)
         return True
     return False
 
 
-async def create_own_tour(data, cats, accommodation):
+def create_own_tour(data, cats, accommodation):
     if data:
         if data["gid"]:
             gid = "Да"
@@ -124,8 +141,8 @@ async def create_own_tour(data, cats, accommodation):
                 f"Транспорт: <b>{data['transport']}</b> \n"
                 f"Питание: <b>{data['meal']}</b> \n"
                 f"Кол-во людей: <b>{data['people']}</b> \n"
-                f"Дата начала: <b>{await format_date(data['datefrom'])}</b> \n"
-                f"Дата окончания: <b>{await format_date(data['dateto'])}</b> \n"
+                f"Дата начала: <b>{format_date(data['datefrom'])}</b> \n"
+                f"Дата окончания: <b>{format_date(data['dateto'])}</b> \n"
                 f"Нужен ли ГИД: <b>{gid}</b> \n"
                 f"Комментарии и дополнительная информация: <b>{data['comment']}</b> \n"
             )
@@ -140,16 +157,16 @@ async def create_own_tour(data, cats, accommodation):
                 f"Транспорт: <b>{data['transport']}</b> \n"
                 f"Питание: <b>{data['meal']}</b> \n"
                 f"Кол-во людей: <b>{data['people']}</b> \n"
-                f"Дата начала: <b>{await format_date(data['datefrom'])}</b> \n"
-                f"Дата окончания: <b>{await format_date(data['dateto'])}</b> \n"
+                f"Дата начала: <b>{format_date(data['datefrom'])}</b> \n"
+                f"Дата окончания: <b>{format_date(data['dateto'])}</b> \n"
                 f"Комментарии и дополнительная информация: <b>{data['comment']}</b> \n"
             )
-        await bot.send_message(CHAT_ID, msg)
+        enqueue(msg)
         return True
     return False
 
 
-async def tour_request(data):
+def tour_request(data):
     if data:
         try:
             start = data["p_start"]
@@ -174,12 +191,12 @@ async def tour_request(data):
                 f"Телефон: <b>{data['phone']}</b> \n"
                 f"Комментарий и дополнительная информация: <b>{data['comment']}</b> \n"
             )
-        await bot.send_message(CHAT_ID, msg)
+        enqueue(msg)
         return True
     return False
 
 
-async def create_lead(lead, travelers=False):
+def create_lead(lead, travelers=False):
     msg = (
         f"<b>Новая покупка!!!</b> \n"
         f"Желаемый тур: <b>{lead['tour_name']}</b> \n"
@@ -189,7 +206,7 @@ async def create_lead(lead, travelers=False):
         f"Фамилия: <b>{lead['last_name']}</b> \n"
         f"Адрес электронной: <b>{lead['email']}</b> \n"
         f"Телефон: <b>{lead['phone']}</b> \n"
-        f"Дата рождения: <b>{await formate_date_2(lead['dateofborn'])}</b> \n"
+        f"Дата рождения: <b>{formate_date_2(lead['dateofborn'])}</b> \n"
         f"Пол: <b>{lead['gender']}</b> \n"
         f"Национальность: <b>{lead['nationality']}</b> \n\n"
         # f"Адрес: <b>{lead['address']}</b> \n"
@@ -206,15 +223,17 @@ async def create_lead(lead, travelers=False):
                 f"<b>Путешественник - {index}</b> \n"
                 f"Имя: <b>{traveler['first_name']}</b> \n"
                 f"Фамилия: <b>{traveler['last_name']}</b> \n"
-                f"Дата рождения: <b>{await formate_date_2(traveler['dateofborn'])}</b> \n"
+                f"Дата рождения: <b>{formate_date_2(traveler['dateofborn'])}</b> \n"
                 f"Пол: <b>{traveler['gender']}</b> \n"
                 f"Национальность: <b>{traveler['nationality']}</b> \n\n"
             )
             msg += traveler_msg
 
-    await bot.send_message(CHAT_ID, msg)
+    enqueue(msg)
     return True
 
 
 if __name__ == "__main__":
-    executor.start_polling(dp)
+    from aiogram import Dispatcher, executor
+
+    executor.start_polling(Dispatcher(get_bot()))
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+
+from aiogram.utils import exceptions
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from src.base.metrics import registry
+from src.base.outbox import claim, mark_failed, mark_sent, release
+from src.base.retry import backoff_delay
+from src.tg_bot.bot import get_bot
+from src.tg_bot.models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Errors that will not go away by retrying the same message
+PERMANENT_ERRORS = (exceptions.BadRequest,)
+
+# Errors of the bot itself (a revoked or rotated token): no message can be
+# delivered until the worker is fixed, so it stops and leaves the queue alone
+WORKER_ERRORS = (exceptions.Unauthorized,)
+
+
+class Command(BaseCommand):
+    help = "Deliver queued Telegram notifications"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep on an empty queue")
+        parser.add_argument("--max-attempts", type=int, default=10)
+        parser.add_argument("--lease", type=int, default=120, help="Seconds a claimed batch stays hidden from other workers")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.deliver(options))
+
+    async def deliver(self, options):
+        # One Bot means one aiohttp session (and its keep-alive connection to
+        # api.telegram.org) for the lifetime of the worker
+        bot = get_bot()
+        try:
+            while True:
+                registry.maybe_flush()
+                await sync_to_async(close_old_connections)()
+                notifications = await sync_to_async(claim)(Notification, options["batch_size"], options["lease"])
+                if not notifications:
+                    if options["once"]:
+                        break
+                    await asyncio.sleep(options["poll_interval"])
+                    continue
+                for i, notification in enumerate(notifications):
+                    try:
+                        await self.send(bot, notification, options["max_attempts"])
+                    except WORKER_ERRORS as e:
+                        await sync_to_async(release)(notifications[i:])
+                        raise CommandError(f"Telegram refused the bot, notifications stay queued: {e}")
+        finally:
+            registry.flush()
+            session = await bot.get_session()
+            await session.close()
+            # The queries ran on sync_to_async's thread, whose connection outlives asyncio.run()
+            await sync_to_async(connections.close_all)()
+
+    async def send(self, bot, notification, max_attempts):
+        started = time.perf_counter()
+        try:
+            await bot.send_message(notification.chat_id, notification.text)
+        except exceptions.RetryAfter as e:
+            # Flood control applies to the whole bot, so hold the rest of the batch too
+            registry.inc("telegram_notifications_total", {"result": "flood_control"})
+            await sync_to_async(mark_failed)(notification, e, e.timeout, max_attempts)
+            await asyncio.sleep(e.timeout)
+        except WORKER_ERRORS:
+            raise
+        except PERMANENT_ERRORS as e:
+            logger.error("Notification %s rejected: %s", notification.pk, e)
+            registry.inc("telegram_notifications_total", {"result": "rejected"})
+            await sync_to_async(mark_failed)(notification, e, None, max_attempts)
+        except Exception as e:
+            logger.warning("Notification %s failed: %s", notification.pk, e)
+            registry.inc("telegram_notifications_total", {"result": "error"})
+            delay = backoff_delay(notification.attempts + 1)
+            await sync_to_async(mark_failed)(notification, e, delay, max_attempts)
+        else:
+            duration = time.perf_counter() - started
+            latency = timezone.now() - notification.created_at
+            registry.inc("telegram_notifications_total", {"result": "sent"})
+            registry.observe("telegram_send_seconds", duration)
+            registry.observe("telegram_notification_latency_seconds", latency.total_seconds())
+            await sync_to_async(mark_sent)(notification, duration, latency_ms=round(latency.total_seconds() * 1000))
+            self.stdout.write(f"Sent notification {notification.pk} in {duration * 1000:.0f} ms")
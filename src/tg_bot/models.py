@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Notification(models.Model):
+    STATUS_CHOICES = (
+        (1, "В очереди"),
+        (2, "Отправлено"),
+        (3, "Ошибка"),
+    )
+
+    chat_id = models.CharField(_("Чат"), max_length=64)
+    text = models.TextField(_("Сообщение"))
+    status = models.IntegerField(_("Статус"), choices=STATUS_CHOICES, default=1)
+    attempts = models.IntegerField(_("Попыток"), default=0)
+    last_error = models.TextField(_("Последняя ошибка"), blank=True, default="")
+    created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
+    next_attempt_at = models.DateTimeField(_("Следующая попытка"), default=timezone.now)
+    sent_at = models.DateTimeField(_("Дата отправки"), null=True, blank=True)
+    send_duration_ms = models.IntegerField(_("Время запроса (мс)"), null=True, blank=True)
+    latency_ms = models.IntegerField(_("Задержка доставки (мс)"), null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_status_display()} #{self.pk}"
+
+    class Meta:
+        verbose_name = _("Уведомление")
+        verbose_name_plural = _("Уведомления")
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
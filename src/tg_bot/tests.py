@@ -0,0 +1,59 @@
+from unittest import mock
+
+from aiogram.utils import exceptions
+from django.core.management import CommandError, call_command
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from src.base.outbox import FAILED, QUEUED, SENT
+from src.base.testing import EndpointTestMixin
+from .bot import enqueue
+from .models import Notification
+
+
+class FakeBot:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        if self.error:
+            raise self.error
+        self.sent.append((chat_id, text))
+
+    async def get_session(self):
+        return self
+
+    async def close(self):
+        pass
+
+
+# The worker reads the queue from a thread of its own, so the rows have to be committed
+class DeliverNotificationsTests(EndpointTestMixin, TransactionTestCase):
+    def deliver(self, bot):
+        with mock.patch("src.tg_bot.management.commands.deliver_notifications.get_bot", return_value=bot):
+            call_command("deliver_notifications", "--once", stdout=mock.MagicMock())
+
+    def test_delivers_queue(self):
+        enqueue("first")
+        enqueue("second")
+        bot = FakeBot()
+        self.deliver(bot)
+        self.assertEqual(bot.sent, [("1", "first"), ("1", "second")])
+        self.assertEqual(set(Notification.objects.values_list("status", "attempts")), {(SENT, 1)})
+
+    def test_rejected_message_gives_up(self):
+        enqueue("to a deleted chat")
+        with self.assertLogs("src.tg_bot.management.commands.deliver_notifications", "ERROR"):
+            self.deliver(FakeBot(exceptions.ChatNotFound("Chat not found")))
+        notification = Notification.objects.get()
+        self.assertEqual((notification.status, notification.attempts), (FAILED, 1))
+
+    def test_revoked_token_stops_worker_and_keeps_queue(self):
+        enqueue("first")
+        enqueue("second")
+        with self.assertRaises(CommandError):
+            self.deliver(FakeBot(exceptions.Unauthorized("Unauthorized")))
+        for notification in Notification.objects.all():
+            self.assertEqual((notification.status, notification.attempts), (QUEUED, 0))
+            self.assertLessEqual(notification.next_attempt_at, timezone.now())
@@ -52,7 +52,8 @@ class TourAdmin(admin.ModelAdmin):
         "slug",
     )
     search_help_text = "Поиск по всем данным"
-    readonly_fields = ("created_at", "last_mod", "views")
+    readonly_fields = ("created_at", "last_mod", "views", "avg_rating", "total_reviews")
+    exclude = Tour.RATING_FIELDS + ("rating_sum",)
     inlines = (PricesInline, RouteInline, ImagesInline)
 
     def get_html_img(self, object):
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ToursConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'src.tours'
+
+    def ready(self):
+        # Catalog changes from the admin, the shell or management commands all reach the snapshot
+        from . import snapshot  # noqa: F401
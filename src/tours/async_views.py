@@ -0,0 +1,71 @@
+from django.db.models import prefetch_related_objects
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from src.base.aio import cached, conditional, gather_sync, render_json, run_sync
+from src.base.counters import view_counter
+from .models import Tour
+from .serializers import (
+    MainToursSerializer,
+    TourDetailSerializer,
+    UpcomingToursSerializer,
+)
+from .views import CategoriesAPIView, GuaranteedToursAPIView, MainPageAPIView, TourDetailAPIView
+
+
+async def main_page(request, lang_code):
+    async def build():
+        # A context each: batch loaders live in it and are not safe to share between threads
+        tours, upcoming_tours = await gather_sync(
+            lambda: MainToursSerializer(
+                Tour.objects.filter(top=True, lang=lang_code), many=True, context={"request": request}
+            ).data,
+            lambda: UpcomingToursSerializer(
+                Tour.objects.filter(type=1, lang=lang_code).order_by("-id")[:4], many=True, context={"request": request}
+            ).data,
+        )
+        return render_json({"tours": tours, "upcoming_tour": upcoming_tours})
+
+    return await cached(MainPageAPIView, request, lang_code, build)
+
+
+async def tour_detail(request, slug):
+    async def build():
+        try:
+            tour = await Tour.objects.aget(slug=slug)
+        except Tour.DoesNotExist:
+            # The body DRF sends for the sync view's Http404
+            return render_json({"detail": NotFound.default_detail}, status=404)
+
+        view_counter.increment(Tour, tour.pk)
+        tour.views += 1
+
+        def serialize():
+            prefetch_related_objects([tour], "images__derivatives", "prices", "routes", "reviews")
+            return TourDetailSerializer(tour, context={"request": request}).data
+
+        return render_json(await run_sync(serialize))
+
+    return await conditional(TourDetailAPIView, request, {"slug": slug}, build)
+
+
+async def guaranteed_tours(request, lang_code):
+    # Search and pagination are the sync view's, run off the event loop
+    view = GuaranteedToursAPIView(request=Request(request), kwargs={"lang_code": lang_code}, format_kwarg=None)
+
+    def build():
+        page = view.paginate_queryset(view.filter_queryset(view.get_queryset()))
+        return view.get_paginated_response(view.get_serializer(page, many=True).data).data
+
+    async def respond():
+        return render_json(await run_sync(build))
+
+    return await conditional(GuaranteedToursAPIView, request, {"lang_code": lang_code}, respond, view=view)
+
+
+categories_view = CategoriesAPIView.as_view()
+
+
+async def categories(request, lang_code):
+    # The catalog snapshot is already rendered: same document, ETag and encoded bodies as the sync view
+    return await run_sync(categories_view, request, lang_code=lang_code)
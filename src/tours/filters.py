@@ -0,0 +1,35 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from rest_framework import filters
+
+from .models import Tour
+
+
+class TourSearchFilter(filters.SearchFilter):
+    """
+    Full-text search over ``Tour.search_vector``, ranked by relevance.
+
+    The text-search configuration follows the ``lang_code`` of the URL so
+    stemming matches the language the tours were written in. Databases
+    without tsvector support fall back to a plain ``icontains`` match.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, "").strip()
+        if not terms:
+            return queryset
+
+        if connection.vendor != "postgresql":
+            return queryset.filter(
+                Q(title__icontains=terms) | Q(short_desc__icontains=terms) | Q(description__icontains=terms)
+            )
+
+        query = SearchQuery(terms, config=Tour.search_config(view.kwargs.get("lang_code")), search_type="websearch")
+        return (
+            queryset.filter(search_vector=query)
+            # ts_rank is a float4; as float8 it round-trips exactly through a pagination cursor
+            .annotate(search_rank=Cast(SearchRank(F("search_vector"), query), FloatField()))
+            .order_by("-search_rank", "-id")
+        )
@@ -0,0 +1,17 @@
+from src.base.loaders import FirstRelatedLoader
+from .models import Images, Prices
+
+
+class FirstAvailablePriceLoader(FirstRelatedLoader):
+    key_field = "tour_id"
+    ordering = ("start", "id")
+
+    def get_queryset(self):
+        return Prices.objects.filter(status=1)
+
+
+class TourCoverImageLoader(FirstRelatedLoader):
+    key_field = "tour_id"
+
+    def get_queryset(self):
+        return Images.objects.all()
@@ -0,0 +1,118 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from src.base.loadgen import run_load
+from src.main.models import Articles
+from src.tours.models import Tour
+
+SERVERS = {
+    "sync": ["nomad.wsgi:application"],
+    "asgi": ["nomad.asgi:application", "--worker-class", "uvicorn.workers.UvicornWorker"],
+}
+
+
+def process_tree_rss(pid):
+    """Resident memory of ``pid`` and all its descendants, in bytes."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+class Command(BaseCommand):
+    help = "Compare sync gunicorn workers with uvicorn ASGI workers on the hot read endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Worker processes per server (equal memory footprint)")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--lang", default="en")
+        parser.add_argument("--mode", choices=["both", *SERVERS], default="both")
+        parser.add_argument("--with-cache", action="store_true", help="Keep the configured CACHES (default: dummy cache)")
+
+    def handle(self, *args, **options):
+        lang = options["lang"]
+        paths = [f"/api/{lang}/tour/main", f"/api/{lang}/tour/guaranteed", f"/api/{lang}/tour/categories"]
+        tour_slug = Tour.objects.filter(lang=lang).values_list("slug", flat=True).first()
+        if tour_slug:
+            paths.append(f"/api/tour/detail/{tour_slug}")
+        article_slug = Articles.objects.filter(lang=lang).values_list("slug", flat=True).first()
+        if article_slug:
+            paths.append(f"/api/article/detail/{article_slug}")
+
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "nomad.settings"))
+        env.pop("ROOT_URLCONF", None)
+        if not options["with_cache"]:
+            env["CACHE_BACKEND"] = "django.core.cache.backends.dummy.DummyCache"
+
+        modes = SERVERS if options["mode"] == "both" else [options["mode"]]
+        self.stdout.write(f"{len(paths)} endpoints, {options['workers']} workers, concurrency {options['concurrency']}")
+        self.stdout.write(f"{'mode':<6}{'RSS MB':>9}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'req/s/GB':>10}")
+        for mode in modes:
+            result, rss = self.bench(mode, paths, env, options)
+            self.stdout.write(
+                f"{mode:<6}{rss / 2 ** 20:>9.0f}{result['rps']:>10.1f}{result['p50_ms']:>9.1f}"
+                f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['errors']:>8}{result['rps'] / (rss / 2 ** 30):>10.0f}"
+            )
+
+    def bench(self, mode, paths, env, options):
+        base_url = f"http://127.0.0.1:{options['port']}"
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", *SERVERS[mode],
+                "--workers", str(options["workers"]),
+                "--bind", f"127.0.0.1:{options['port']}",
+                "--log-level", "warning",
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        try:
+            self.wait_until_ready(base_url + paths[0], server)
+            run_load(base_url, paths, options["concurrency"], min(2.0, options["duration"]))
+            result = run_load(base_url, paths, options["concurrency"], options["duration"])
+            return result, process_tree_rss(server.pid)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+    def wait_until_ready(self, url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with {server.returncode}")
+            try:
+                urllib.request.urlopen(url, timeout=5)
+                return
+            except urllib.error.HTTPError:
+                return
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        raise RuntimeError(f"Server did not answer {url} within {timeout}s")
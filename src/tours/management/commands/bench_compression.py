@@ -0,0 +1,53 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from src.base.compression import available_encodings
+
+from .run_benchmark import benchmark_endpoints, git_revision
+
+
+class Command(BaseCommand):
+    help = "Compare bytes on the wire and CPU per request of the main API endpoints with and without compression"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lang", default="en")
+        parser.add_argument("--requests", type=int, default=50, help="Measured requests per endpoint and encoding")
+        parser.add_argument("--only", nargs="+", help="Benchmark only these endpoint names")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def measure(self, client, path, encoding, n):
+        # Warm up first, so cached endpoints are measured on their cache hit path
+        response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+        started = time.process_time()
+        for _ in range(n):
+            response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+        return {
+            "bytes": len(response.content),
+            "cpu_ms": (time.process_time() - started) * 1000 / n,
+            "encoding": response.get("Content-Encoding", "identity"),
+            "cache": response.get("X-Cache"),
+        }
+
+    def handle(self, *args, **options):
+        endpoints = benchmark_endpoints(options["lang"])
+        if options["only"]:
+            endpoints = {name: path for name, path in endpoints.items() if name in options["only"]}
+        encodings = ["identity", *available_encodings()]
+        client = Client()
+
+        results = {}
+        header = "".join(f"{f'{e} B':>12}{f'{e} ms':>12}" for e in encodings)
+        self.stdout.write(f"{'endpoint':<16}{header}")
+        with override_settings(ALLOWED_HOSTS=["*"], SERVER_TIMING_SAMPLE_RATE=0):
+            for name, path in endpoints.items():
+                results[name] = {e: self.measure(client, path, e, options["requests"]) for e in encodings}
+                row = "".join(f"{results[name][e]['bytes']:>12}{results[name][e]['cpu_ms']:>12.2f}" for e in encodings)
+                self.stdout.write(f"{name:<16}{row}")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"revision": git_revision(), "lang": options["lang"], "endpoints": results}, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
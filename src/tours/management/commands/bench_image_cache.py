@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from src.base.images import purge_derivatives
+from src.tours.models import Images
+from src.tours.views import CompressedTourImageView
+
+
+class Command(BaseCommand):
+    help = "Compare cold and warm requests per second of the compressed tour image endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--image-id", type=int, help="Tour image to request (defaults to the first one with a file)")
+        parser.add_argument("--requests", type=int, default=200)
+
+    def handle(self, *args, **options):
+        if options["image_id"]:
+            image = Images.objects.filter(id=options["image_id"]).first()
+        else:
+            image = Images.objects.exclude(img="").exclude(img__isnull=True).order_by("id").first()
+        if image is None or not image.img:
+            raise CommandError("No tour image with a file to benchmark against")
+
+        view = CompressedTourImageView.as_view()
+        factory = RequestFactory()
+        n = options["requests"]
+
+        def run(before=None, headers=None):
+            started = time.perf_counter()
+            for _ in range(n):
+                if before:
+                    before()
+                response = view(factory.get(f"/api/compressed-tour-image/{image.id}", headers=headers), image_id=image.id)
+                if hasattr(response, "streaming_content"):
+                    b"".join(response.streaming_content)
+                    response.close()
+            return n / (time.perf_counter() - started), response
+
+        cold_rps, _ = run(before=lambda: purge_derivatives(image.img.name))
+        warm_rps, response = run()
+        not_modified_rps, _ = run(headers={"If-None-Match": response["ETag"]})
+
+        self.stdout.write(f"image {image.id} ({image.img.name}), {n} requests each")
+        self.stdout.write(f"cold (decode/resize/encode): {cold_rps:10.1f} req/s")
+        self.stdout.write(f"warm (cached file):          {warm_rps:10.1f} req/s")
+        self.stdout.write(f"revalidated (304):           {not_modified_rps:10.1f} req/s")
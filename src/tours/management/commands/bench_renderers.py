@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from src.base import renderers
+from src.base.renderers import ORJSONRenderer
+from src.tours.models import Tour
+from src.tours.serializers import TourDetailSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare render time of the stock and the orjson JSON renderer on a TourDetailSerializer payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--slug", help="Tour to serialize (defaults to the newest one)")
+        parser.add_argument("--renders", type=int, default=2000, help="Renders per renderer")
+
+    def handle(self, *args, **options):
+        tours = Tour.objects.prefetch_related("images__derivatives", "prices", "routes")
+        if options["slug"]:
+            tour = tours.filter(slug=options["slug"]).first()
+        else:
+            tour = tours.order_by("-id").first()
+        if tour is None:
+            raise CommandError("No tour to serialize, run generate_catalog first")
+
+        data = TourDetailSerializer(tour).data
+        n = options["renders"]
+        self.stdout.write(f"tour {tour.slug}, {n} renders each, orjson {'installed' if renderers.orjson else 'missing'}")
+
+        results = {}
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            started = time.perf_counter()
+            for _ in range(n):
+                content = renderer.render(data)
+            results[type(renderer).__name__] = (time.perf_counter() - started) * 1e6 / n
+            self.stdout.write(f"{type(renderer).__name__:<16}{results[type(renderer).__name__]:>10.1f} us{len(content):>10} B")
+
+        self.stdout.write(f"speedup {results['JSONRenderer'] / results['ORJSONRenderer']:.1f}x")
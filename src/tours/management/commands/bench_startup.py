@@ -0,0 +1,91 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from .run_benchmark import git_revision
+
+# Libraries a web worker should only load when a request actually needs them
+HEAVY = ("aiogram", "aiohttp", "pydantic", "PIL", "debug_toolbar")
+
+# Run in a fresh interpreter per module so each import is cold
+PROBE = """
+import json, os, sys, time
+
+def rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - started
+before, loaded = rss(), set(sys.modules)
+
+started = time.perf_counter()
+if sys.argv[1] != "django.setup":
+    __import__(sys.argv[1])
+print(json.dumps({
+    "setup_ms": setup * 1000,
+    "import_ms": (time.perf_counter() - started) * 1000,
+    "rss_bytes": rss(),
+    "rss_delta_bytes": rss() - before,
+    "modules": len(set(sys.modules) - loaded),
+    "heavy": sorted({name.split(".")[0] for name in sys.modules} & set(%r)),
+}))
+""" % (HEAVY,)
+
+
+class Command(BaseCommand):
+    help = "Measure cold import time and resident memory of each app module after django.setup()"
+
+    def add_arguments(self, parser):
+        parser.add_argument("modules", nargs="*", help="Dotted module paths; defaults to every app's views and the URLconf")
+        parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module; the median is reported")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def default_modules(self):
+        apps = [app for app in settings.INSTALLED_APPS if app.startswith("src.")]
+        return ["django.setup", *(f"{app}.views" for app in apps if self.exists(f"{app}.views")), settings.ROOT_URLCONF]
+
+    def exists(self, module):
+        return os.path.exists(os.path.join(settings.BASE_DIR, *module.split(".")) + ".py")
+
+    def probe(self, module):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "nomad.settings")}
+        output = subprocess.check_output([sys.executable, "-c", PROBE, module], cwd=settings.BASE_DIR, env=env, text=True)
+        return json.loads(output.splitlines()[-1])
+
+    def handle(self, *args, **options):
+        results = {}
+        self.stdout.write(f"{'module':<24}{'import ms':>11}{'rss MB':>9}{'+rss MB':>9}{'modules':>9}  heavy")
+        for module in options["modules"] or self.default_modules():
+            runs = [self.probe(module) for _ in range(options["repeat"])]
+            key = "setup_ms" if module == "django.setup" else "import_ms"
+            result = {
+                "import_ms": round(statistics.median(run[key] for run in runs), 1),
+                "rss_mb": round(statistics.median(run["rss_bytes"] for run in runs) / 2 ** 20, 1),
+                "rss_delta_mb": round(statistics.median(run["rss_delta_bytes"] for run in runs) / 2 ** 20, 1),
+                "modules": runs[-1]["modules"],
+                "heavy": runs[-1]["heavy"],
+            }
+            if module == "django.setup":
+                result["rss_delta_mb"] = result["rss_mb"]
+            results[module] = result
+            self.stdout.write(
+                f"{module:<24}{result['import_ms']:>11.1f}{result['rss_mb']:>9.1f}{result['rss_delta_mb']:>9.1f}"
+                f"{result['modules']:>9}  {', '.join(result['heavy'])}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"revision": git_revision(), "python": sys.version.split()[0], "modules": results}, f, indent=2)
@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework import filters
+
+from src.tours.models import Category, Tour
+from src.tours.views import GuaranteedToursAPIView
+
+WORDS = [
+    "issyk-kul", "song-kol", "karakol", "bishkek", "osh", "naryn", "tash-rabat", "ala-archa", "yurt",
+    "horse", "trek", "lake", "canyon", "glacier", "pass", "valley", "nomad", "felt", "eagle", "hunter",
+    "silk", "road", "caravanserai", "mountain", "hiking", "camp", "festival", "kumis", "jailoo", "tien-shan",
+    "pamir", "waterfall", "gorge", "sunrise", "jeep", "tour", "guide", "village", "family", "adventure",
+]
+SYLLABLES = ["ka", "ra", "kol", "tash", "su", "bel", "ak", "jol", "tor", "sai", "ata", "min", "bu", "ysh", "len"]
+QUERIES = ["lake", "horse trek", "issyk-kul yurt", "glacier pass", "eagle hunter festival", "silk road"]
+
+
+class TextGenerator:
+    # Zipf-like vocabulary so common words are common and place names are not
+    def __init__(self, rng, size=5000):
+        self.rng = rng
+        filler = {"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)}
+        self.vocabulary = list(filler - set(WORDS))
+        for word in WORDS:
+            self.vocabulary.insert(rng.randint(20, len(self.vocabulary)), word)
+        self.weights = [1 / (rank + 1) for rank in range(len(self.vocabulary))]
+
+    def __call__(self, n):
+        return " ".join(self.rng.choices(self.vocabulary, weights=self.weights, k=n))
+
+
+class LegacySearchView(GuaranteedToursAPIView):
+    filter_backends = [filters.SearchFilter]
+    search_fields = ["cat__name", "images__location", "description", "excluded", "included", "title"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark guaranteed-tour search against a synthetic catalog (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tours", type=int, default=50000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The search benchmark needs PostgreSQL")
+
+        sentence = TextGenerator(random.Random(42))
+        with transaction.atomic():
+            self.stdout.write(f"Generating {options['tours']} tours...")
+            langs = [lang for lang, _ in Tour.LANG_CHOICES]
+            categories = [Category.objects.create(name=f"bench {lang}", slug=f"bench-{lang}", lang=lang) for lang in langs]
+            Tour.objects.bulk_create(
+                [
+                    Tour(
+                        lang=categories[i % len(langs)].lang,
+                        cat=categories[i % len(langs)],
+                        type=1,
+                        title=sentence(5),
+                        slug=f"bench-{i}",
+                        short_desc=f"<p>{sentence(20)}</p>",
+                        description=f"<p>{sentence(200)}</p>",
+                        included=f"<p>{sentence(30)}</p>",
+                        excluded=f"<p>{sentence(30)}</p>",
+                    )
+                    for i in range(options["tours"])
+                ],
+                batch_size=2000,
+            )
+            for lang in langs:
+                Tour.objects.filter(lang=lang).update(search_vector=Tour.build_search_vector(lang))
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE tours_tour")
+
+            factory = RequestFactory()
+            for label, view_class in (("icontains", LegacySearchView), ("full-text", GuaranteedToursAPIView)):
+                view = view_class.as_view()
+                timings = []
+                for _ in range(options["repeat"]):
+                    for query in QUERIES:
+                        request = factory.get("/api/en/tour/guaranteed", {"search": query})
+                        started = time.perf_counter()
+                        view(request, lang_code="en").render()
+                        timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"{label:>10}: mean {statistics.mean(timings):8.2f} ms, "
+                    f"p95 {statistics.quantiles(timings, n=20)[-1]:8.2f} ms, "
+                    f"{1000 / statistics.mean(timings):8.1f} req/s"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from src.base.catalog import LANGS, seed_catalog
+from src.car_rent.models import Car, CarType
+from src.main.models import FAQ, ArticleCats, CreateOwnTourRec, Gallery, SiteReviews
+from src.tours.models import Category, Slider, Tour
+
+GENERATED = (Tour, Category, Slider, FAQ, CreateOwnTourRec, ArticleCats, Gallery, Car, CarType, SiteReviews)
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic catalog (categories x tours with prices, images, routes and reviews) per language"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--langs", nargs="+", choices=LANGS, default=list(LANGS))
+        parser.add_argument("--categories", type=int, default=10, help="Categories per language")
+        parser.add_argument("--tours", type=int, default=20, help="Tours per category")
+        parser.add_argument("--prices", type=int, default=4, help="Price dates per tour")
+        parser.add_argument("--images", type=int, default=0, help="Images per tour, article, gallery and car (runs the image pipeline)")
+        parser.add_argument("--routes", type=int, default=7, help="Route days per tour")
+        parser.add_argument("--reviews", type=int, default=10, help="Approved reviews per tour")
+        parser.add_argument("--articles", type=int, default=20, help="Articles per language")
+        parser.add_argument("--cars", type=int, default=20, help="Cars per language")
+        parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs in every RichText body")
+        parser.add_argument("--clear", action="store_true", help="Delete the existing catalog first")
+        parser.add_argument("--noinput", "--no-input", action="store_false", dest="interactive")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            if options["interactive"] and input("This deletes every tour, article, gallery and car. Type 'yes' to continue: ") != "yes":
+                raise CommandError("Cancelled")
+            for model in GENERATED:
+                model.objects.all().delete()
+        elif Tour.objects.filter(slug__startswith="tour-0-0-").exists():
+            raise CommandError("A generated catalog already exists, pass --clear to replace it")
+
+        for lang in options["langs"]:
+            started = time.perf_counter()
+            with transaction.atomic():
+                seed_catalog(
+                    langs=[lang],
+                    categories=options["categories"],
+                    tours=options["tours"],
+                    prices=options["prices"],
+                    images=options["images"],
+                    routes=options["routes"],
+                    reviews=options["reviews"],
+                    articles=options["articles"],
+                    cars=options["cars"],
+                    paragraphs=options["paragraphs"],
+                )
+            self.stdout.write(
+                f"{lang}: {options['categories'] * options['tours']} tours in {time.perf_counter() - started:.1f}s"
+            )
@@ -0,0 +1,43 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from src.tours.models import Tour, TourReviews
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized rating aggregates of every tour and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drift, do not write")
+
+    def handle(self, *args, **options):
+        expected = defaultdict(lambda: {"total_reviews": 0, "rating_sum": Decimal(0), **dict.fromkeys(Tour.RATING_FIELDS, 0)})
+        approved = TourReviews.objects.filter(status=1, tour__isnull=False).values_list("tour_id", "rating")
+        for tour_id, rating in approved.iterator():
+            stats = expected[tour_id]
+            stats["total_reviews"] += 1
+            if rating is not None:
+                stats["rating_sum"] += rating
+                stats[f"rating_{Tour.rating_bucket(rating)}"] += 1
+
+        fields = ("total_reviews", "rating_sum") + Tour.RATING_FIELDS
+        drifted = []
+        for tour in Tour.objects.only("id", "title", *fields).iterator():
+            stats = expected.get(tour.id) or expected.default_factory()
+            diff = {f: (getattr(tour, f), stats[f]) for f in fields if getattr(tour, f) != stats[f]}
+            if diff:
+                drifted.append(tour.id)
+                changes = ", ".join(f"{f}: {old} -> {new}" for f, (old, new) in diff.items())
+                self.stdout.write(f"tour {tour.id} ({tour}): {changes}")
+                if not options["dry_run"]:
+                    with transaction.atomic():
+                        Tour.objects.filter(pk=tour.id).update(**stats)
+                        Tour.refresh_avg_rating([tour.id])
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(drifted)} tours drifted (dry run, nothing written)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(drifted)} tours rebuilt"))
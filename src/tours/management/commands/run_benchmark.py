@@ -0,0 +1,105 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from src.base.loadgen import run_load
+from src.car_rent.models import Car
+from src.main.models import Articles
+from src.tours.models import Category, Tour
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_endpoints(lang):
+    """Paths of the main API endpoints for ``lang``, detail pages taken from the first rows of the catalog."""
+    endpoints = {
+        "main": f"/api/{lang}/tour/main",
+        "slider": f"/api/{lang}/tour/slider",
+        "guaranteed": f"/api/{lang}/tour/guaranteed",
+        "categories": f"/api/{lang}/tour/categories",
+        "rightbar": f"/api/{lang}/tour/rightbar",
+        "faq": f"/api/{lang}/main/faq",
+        "articles": f"/api/{lang}/main/articles",
+        "site-reviews": "/api/main/site-review-list",
+        "sitemap": "/api/sitemap.xml",
+    }
+    category = Category.objects.filter(lang=lang).values_list("slug", flat=True).first()
+    if category:
+        endpoints["category-tours"] = f"/api/tour/list/{category}"
+    tour = Tour.objects.filter(lang=lang).values_list("slug", flat=True).first()
+    if tour:
+        endpoints["tour-detail"] = f"/api/tour/detail/{tour}"
+    article = Articles.objects.filter(lang=lang).values_list("slug", flat=True).first()
+    if article:
+        endpoints["article-detail"] = f"/api/article/detail/{article}"
+    car = Car.objects.filter(lang=lang).values_list("pk", "type_id").first()
+    if car:
+        endpoints["car-list"] = f"/api/car/list/{car[1]}"
+        endpoints["car-detail"] = f"/api/car/detail/{car[0]}"
+    return endpoints
+
+
+class Command(BaseCommand):
+    help = "Load-test the main API endpoints of a running server and write latency, throughput and queries as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--lang", default="en")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint")
+        parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds per endpoint")
+        parser.add_argument("--only", nargs="+", help="Benchmark only these endpoint names")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def count_queries(self, path):
+        # Same code and database as the server, run in-process once with caching off so the SQL can be counted
+        no_cache = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        with override_settings(ALLOWED_HOSTS=["*"], CACHES=no_cache), CaptureQueriesContext(connection) as queries:
+            Client().get(path)
+        return len(queries)
+
+    def handle(self, *args, **options):
+        started_at = datetime.now(timezone.utc)
+        endpoints = benchmark_endpoints(options["lang"])
+        if options["only"]:
+            endpoints = {name: path for name, path in endpoints.items() if name in options["only"]}
+
+        results = {}
+        self.stdout.write(f"{'endpoint':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'queries':>9}")
+        for name, path in endpoints.items():
+            if options["warmup"]:
+                run_load(options["base_url"], [path], options["concurrency"], options["warmup"])
+            result = run_load(options["base_url"], [path], options["concurrency"], options["duration"])
+            result["path"] = path
+            result["queries"] = self.count_queries(path)
+            results[name] = result
+            self.stdout.write(
+                f"{name:<16}{result['rps']:>9.1f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+                f"{result['p99_ms']:>9.1f}{result['errors']:>8}{result['queries']:>9}"
+            )
+
+        if options["output"]:
+            report = {
+                "revision": git_revision(),
+                "started_at": started_at.isoformat(),
+                "base_url": options["base_url"],
+                "lang": options["lang"],
+                "concurrency": options["concurrency"],
+                "duration": options["duration"],
+                "catalog": {"tours": Tour.objects.count(), "categories": Category.objects.count()},
+                "endpoints": results,
+            }
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from src.tours.models import Tour
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search vector of every tour"
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Full-text search vectors require PostgreSQL")
+
+        for lang, _ in Tour.LANG_CHOICES:
+            count = Tour.objects.filter(lang=lang).update(search_vector=Tour.build_search_vector(lang))
+            self.stdout.write(f"{lang} ({Tour.search_config(lang)}): {count} tours")
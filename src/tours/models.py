@@ -1,4 +1,12 @@
-from django.db import models
+from decimal import Decimal, ROUND_HALF_UP
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connection, models, transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import Cast, Now, NullIf, Round
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.contrib.contenttypes.fields import GenericRelation
 from django.utils.translation import gettext_lazy as _
 from .choices import last_12_months_choices
 from ckeditor.fields import RichTextField
@@ -6,6 +14,8 @@ from django.urls import reverse
 from django.utils.text import slugify
 from unidecode import unidecode
 from django_resized import ResizedImageField
+from src.base.images import invalidate_derivatives_on_change
+from src.media.pipeline import register as register_derivatives
 
 
 class Category(models.Model):
@@ -22,8 +32,9 @@ class Category(models.Model):
     name = models.CharField(_("Название"), max_length=200)
     slug = models.SlugField(_("Slug"), max_length=1000)
     img = ResizedImageField(_("Изображение"), upload_to="cat_images", null=True, blank=True, force_format="WEBP", quality=50)
-    alt = models.CharField(null=True, blank=True)
-    img_title = models.CharField(null=True, blank=True)
+    alt = models.CharField(max_length=255, null=True, blank=True)
+    img_title = models.CharField(max_length=255, null=True, blank=True)
+    derivatives = GenericRelation("media.ImageDerivative")
     created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
     last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
 
@@ -64,6 +75,7 @@ class Prices(models.Model):
     deadline = models.DateField(_("Крайний срок"), null=True, blank=True)
     start = models.DateField(_("Начало тура"), null=True, blank=True)
     end = models.DateField(_("Конец тура"), null=True)
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
 
     def __str__(self):
         return str(self.price) or "Price"
@@ -71,6 +83,8 @@ class Prices(models.Model):
     class Meta:
         verbose_name = "Цена"
         verbose_name_plural = "Цены"
+        # FirstAvailablePriceLoader: the earliest available date of a tour is one index lookup
+        indexes = [models.Index(fields=["tour", "status", "start"], name="tour_price_first_available")]
 
 
 class Route(models.Model):
@@ -81,6 +95,7 @@ class Route(models.Model):
     description = RichTextField(_("Программа"), null=True, blank=True)
     hotel = models.CharField(_("Гостиница"), max_length=100, null=True, blank=True)
     meals = models.CharField(_("Питание"), max_length=100, null=True, blank=True)
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
 
     def __str__(self):
         return "Route"
@@ -94,8 +109,10 @@ class Images(models.Model):
     tour = models.ForeignKey("Tour", verbose_name=_("Тур"), on_delete=models.SET_NULL, null=True, blank=True, related_name="images")
     location = models.CharField(_("Место изображение"), max_length=100, null=True, blank=True)
     img = ResizedImageField(_("Изображение"), upload_to="tour_images", null=True, blank=True, force_format="WEBP", quality=50)
-    alt = models.CharField(null=True, blank=True)
-    img_title = models.CharField(null=True, blank=True)
+    alt = models.CharField(max_length=255, null=True, blank=True)
+    img_title = models.CharField(max_length=255, null=True, blank=True)
+    derivatives = GenericRelation("media.ImageDerivative")
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
 
     def __str__(self):
         return self.location or "Image"
@@ -126,6 +143,7 @@ class TourReviews(models.Model):
     name = models.CharField(_("Имя"), max_length=100, null=True, blank=True)
     email = models.EmailField(_("Электронная почта"), max_length=100, null=True, blank=True)
     comment = models.TextField(_("Комментарий"), null=True, blank=True)
+    last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
     date_created = models.DateField(_("Дата отзыва"), auto_now_add=True, null=True, blank=True)
 
     def __str__(self):
@@ -177,7 +195,7 @@ class Tour(models.Model):
         (3, "Предложить свой тур"),
     )
 
-    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en")
+    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en", max_length=2)
     title = models.CharField(_("Заголовок"), max_length=200, null=True, blank=True)
     slug = models.SlugField(_("Slug"), max_length=1000)
     cat = models.ForeignKey(Category, verbose_name=_("Категория"), on_delete=models.CASCADE, null=True, blank=True,
@@ -195,13 +213,68 @@ class Tour(models.Model):
     created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
     last_mod = models.DateTimeField(_("Последняя модификация"), auto_now=True)
 
+    # Denormalized from approved TourReviews, kept in sync by the signals below
+    avg_rating = models.DecimalField(_("Средний рейтинг"), max_digits=3, decimal_places=1, null=True, blank=True)
+    total_reviews = models.IntegerField(_("Кол-во отзывов"), default=0)
+    rating_sum = models.DecimalField(_("Сумма оценок"), max_digits=12, decimal_places=1, default=0)
+    rating_1 = models.IntegerField(_("Оценок 1"), default=0)
+    rating_2 = models.IntegerField(_("Оценок 2"), default=0)
+    rating_3 = models.IntegerField(_("Оценок 3"), default=0)
+    rating_4 = models.IntegerField(_("Оценок 4"), default=0)
+    rating_5 = models.IntegerField(_("Оценок 5"), default=0)
+
+    RATING_FIELDS = ("rating_1", "rating_2", "rating_3", "rating_4", "rating_5")
+    # Only ever written by apply_review/refresh_avg_rating, never from a loaded instance
+    RATING_AGGREGATES = ("avg_rating", "total_reviews", "rating_sum", *RATING_FIELDS)
+
+    # Weighted title (A) > short_desc (B) > description (C), refreshed on save
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    SEARCH_CONFIGS = {
+        "ru": "russian",
+        "en": "english",
+        "de": "german",
+        "fr": "french",
+        "es": "spanish",
+        "jp": "simple",
+    }
+
     class Meta:
         verbose_name = _("Тур")
         verbose_name_plural = _("Туры")
+        indexes = [
+            GinIndex(fields=["search_vector"], name="tour_search_vector_gin"),
+            models.Index(fields=["type", "lang", "-id"], name="tour_type_lang_id"),
+            models.Index(fields=["cat", "-id"], name="tour_cat_id"),
+        ]
 
     def __str__(self):
         return self.title or "Tour title"
 
+    @property
+    def rating_histogram(self):
+        return {str(i): getattr(self, f"rating_{i}") for i in range(1, 6)}
+
+    @staticmethod
+    def rating_bucket(rating):
+        return min(5, max(1, int(Decimal(rating).quantize(Decimal("1"), rounding=ROUND_HALF_UP))))
+
+    @classmethod
+    def apply_review(cls, tour_id, rating, sign):
+        updates = {"total_reviews": F("total_reviews") + sign}
+        if rating is not None:
+            field = f"rating_{cls.rating_bucket(rating)}"
+            updates["rating_sum"] = F("rating_sum") + sign * Decimal(rating)
+            updates[field] = F(field) + sign
+        cls.objects.filter(pk=tour_id).update(**updates)
+
+    @classmethod
+    def refresh_avg_rating(cls, tour_ids):
+        rated = sum((F(field) for field in cls.RATING_FIELDS[1:]), F(cls.RATING_FIELDS[0]))
+        avg = ExpressionWrapper(F("rating_sum") / Cast(NullIf(rated, Value(0)), FloatField()), output_field=FloatField())
+        # Ratings are part of the tour's payload, so its validators have to move too
+        cls.objects.filter(pk__in=tour_ids).update(avg_rating=Round(avg, 1), last_mod=Now())
+
     def get_absolute_url(self):
         return reverse("tour-detail", args=[str(self.pk)])
 
@@ -210,7 +283,31 @@ class Tour(models.Model):
         self.excluded = self.excluded.replace("\r\n\r\n", "")
         self.description = self.description.replace("\r\n\r\n", "")
         # self.slug = f"{slugify(unidecode(self.title))}-{self.lang}"
-        return super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # An admin form loaded before a review was approved must not write its stale aggregates back
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.RATING_AGGREGATES
+            ]
+        super().save(*args, **kwargs)
+        self.update_search_vector()
+
+    @classmethod
+    def search_config(cls, lang):
+        return cls.SEARCH_CONFIGS.get(lang, "simple")
+
+    @classmethod
+    def build_search_vector(cls, lang):
+        config = cls.search_config(lang)
+        return (
+            SearchVector("title", weight="A", config=config)
+            + SearchVector("short_desc", weight="B", config=config)
+            + SearchVector("description", weight="C", config=config)
+        )
+
+    def update_search_vector(self):
+        if connection.vendor == "postgresql":
+            Tour.objects.filter(pk=self.pk).update(search_vector=self.build_search_vector(self.lang))
 
 
 class Slider(models.Model):
@@ -223,15 +320,65 @@ class Slider(models.Model):
         ("jp", "Японский"),
     )
     
-    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en")
+    lang = models.CharField(_("Язык"), choices=LANG_CHOICES, default="en", max_length=2)
     title = models.CharField(_("Заголовок"), max_length=255, null=True, blank=True)
     subtitle = models.CharField(_("Подзаголовок"), max_length=255, null=True, blank=True)
     img = ResizedImageField(_("Изображение"), upload_to="slider", null=True, blank=True, force_format="WEBP", quality=50)
-    alt = models.CharField(null=True, blank=True)
-    img_title = models.CharField(null=True, blank=True)
+    alt = models.CharField(max_length=255, null=True, blank=True)
+    img_title = models.CharField(max_length=255, null=True, blank=True)
+    derivatives = GenericRelation("media.ImageDerivative")
     link = models.URLField(_("Ссылка"), null=True, blank=True)
     is_active = models.BooleanField(_("Активность"), default=False)
 
     class Meta:
         verbose_name = "Слайдер"
         verbose_name_plural = "Слайдеры"
+
+
+invalidate_derivatives_on_change(Images, "img")
+invalidate_derivatives_on_change(Category, "img")
+
+register_derivatives(Images, "img")
+register_derivatives(Category, "img")
+register_derivatives(Slider, "img")
+
+
+def _counted_review(status, rating, tour_id):
+    if status == 1 and tour_id:
+        return (tour_id, rating)
+    return None
+
+
+@receiver(pre_save, sender=TourReviews)
+def remember_counted_review(sender, instance, raw=False, **kwargs):
+    instance._counted_review = None
+    if instance.pk and not raw:
+        old = sender.objects.filter(pk=instance.pk).values_list("status", "rating", "tour_id").first()
+        if old:
+            instance._counted_review = _counted_review(*old)
+
+
+@receiver(post_save, sender=TourReviews)
+def update_tour_rating_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_counted_review", None)
+    new = _counted_review(instance.status, instance.rating, instance.tour_id)
+    if old == new:
+        return
+
+    with transaction.atomic():
+        if old:
+            Tour.apply_review(*old, sign=-1)
+        if new:
+            Tour.apply_review(*new, sign=1)
+        Tour.refresh_avg_rating({counted[0] for counted in (old, new) if counted})
+
+
+@receiver(post_delete, sender=TourReviews)
+def update_tour_rating_on_delete(sender, instance, **kwargs):
+    counted = _counted_review(instance.status, instance.rating, instance.tour_id)
+    if counted:
+        with transaction.atomic():
+            Tour.apply_review(*counted, sign=-1)
+            Tour.refresh_avg_rating({counted[0]})
@@ -1,8 +1,7 @@
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.response import Response
+from src.base.pagination import KeysetPagination
 
 
-class GuaranteedToursPagination(PageNumberPagination):
+class GuaranteedToursPagination(KeysetPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
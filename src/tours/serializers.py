@@ -1,10 +1,9 @@
-import sys
 from datetime import date
 from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
-from PIL import Image
-from io import BytesIO
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from src.base.loaders import BatchListSerializer, BatchLoadingMixin
+from src.media.serializers import SrcsetField
+from .loaders import FirstAvailablePriceLoader, TourCoverImageLoader
 from .models import *
 
 
@@ -53,9 +52,11 @@ class PricesSerializer(serializers.ModelSerializer):
 
 
 class ImagesSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = Images
-        fields = ["id", "location", "img", "alt", "img_title"]
+        fields = ["id", "location", "img", "srcset", "alt", "img_title"]
 
 
 class RouteSerializer(serializers.ModelSerializer):
@@ -89,6 +90,7 @@ class TourDetailSerializer(serializers.ModelSerializer):
     reviews = ReviewSerializer(many=True)
     avg_rating = serializers.DecimalField(max_digits=3, decimal_places=1)
     total_reviews = serializers.IntegerField()
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
     is_youtube_link = serializers.SerializerMethodField()
 
     class Meta:
@@ -97,6 +99,7 @@ class TourDetailSerializer(serializers.ModelSerializer):
             "id",
             "avg_rating",
             "total_reviews",
+            "rating_histogram",
             "title",
             "slug",
             "type",
@@ -147,7 +150,9 @@ class TourDetailSerializer(serializers.ModelSerializer):
         return data
 
 
-class GuaranteedToursSerializer(serializers.ModelSerializer):
+class GuaranteedToursSerializer(BatchLoadingMixin, serializers.ModelSerializer):
+    batch_loaders = (FirstAvailablePriceLoader, TourCoverImageLoader)
+
     img = serializers.URLField(read_only=True)
     alt = serializers.CharField(read_only=True)
     img_title = serializers.CharField(read_only=True)
@@ -175,18 +180,18 @@ class GuaranteedToursSerializer(serializers.ModelSerializer):
             "start_day",
             "currency",
         ]
+        list_serializer_class = BatchListSerializer
 
 
     def to_representation(self, instance):
-        today = date.today()
-
-        price = instance.prices.filter(status=1).order_by("start").first()
-        image = instance.images.first()
+        price = self.load(FirstAvailablePriceLoader, instance.id)
+        image = self.load(TourCoverImageLoader, instance.id)
 
         representation = super().to_representation(instance)
-        representation["img"] = f"https://nomadslife.travel/api/compressed-tour-image/{image.id}"
-        representation["alt"] = image.alt
-        representation["img_title"] = image.img_title
+        if image:
+            representation["img"] = f"https://nomadslife.travel/api/compressed-tour-image/{image.id}"
+            representation["alt"] = image.alt
+            representation["img_title"] = image.img_title
 
         if price:
             representation["price"] = price.price
@@ -197,6 +202,8 @@ class GuaranteedToursSerializer(serializers.ModelSerializer):
 
 
 class SliderSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = Slider
         fields = "__all__"
@@ -213,11 +220,12 @@ class MainCatToursSerializer(serializers.ModelSerializer):
 
 class CategoriesSerializer(serializers.ModelSerializer):
     img = serializers.URLField(read_only=True)
+    srcset = SrcsetField()
     tours = MainCatToursSerializer(many=True)
 
     class Meta:
         model = Category
-        fields = ["id", "name", "slug", "alt", "img_title", "img", "tours",]
+        fields = ["id", "name", "slug", "alt", "img_title", "img", "srcset", "tours",]
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -225,7 +233,9 @@ class CategoriesSerializer(serializers.ModelSerializer):
         return representation
 
 
-class MainToursSerializer(serializers.ModelSerializer):
+class MainToursSerializer(BatchLoadingMixin, serializers.ModelSerializer):
+    batch_loaders = (FirstAvailablePriceLoader, TourCoverImageLoader)
+
     img = serializers.URLField(read_only=True)
     alt = serializers.CharField(read_only=True)
     img_title = serializers.CharField(read_only=True)
@@ -236,30 +246,32 @@ class MainToursSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tour
         fields = ["id", "title", "slug", "price", "start_day", "img", "alt", "img_title", "currency", "duration"]
+        list_serializer_class = BatchListSerializer
 
     def to_representation(self, instance):
 
-        price = instance.prices.filter(status=1).order_by("start").first()
-        image = instance.images.first()
+        price = self.load(FirstAvailablePriceLoader, instance.id)
+        image = self.load(TourCoverImageLoader, instance.id)
 
         representation = super().to_representation(instance)
 
-        representation["img"] = f"https://nomadslife.travel/api/compressed-tour-image/{image.id}"
-        representation["img_title"] = image.img_title
-        representation["alt"] = image.alt
+        if image:
+            representation["img"] = f"https://nomadslife.travel/api/compressed-tour-image/{image.id}"
+            representation["img_title"] = image.img_title
+            representation["alt"] = image.alt
 
         if price:
             representation["price"] = price.price
             representation["currency"] = price.currency
             representation["start_day"] = price.start.strftime("%Y, %d %B")
             representation["status"] = price.status
-            representation["img_title"] = image.img_title
-            representation["alt"] = image.alt
 
         return representation
 
 
-class UpcomingToursSerializer(serializers.ModelSerializer):
+class UpcomingToursSerializer(BatchLoadingMixin, serializers.ModelSerializer):
+    batch_loaders = (FirstAvailablePriceLoader,)
+
     price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     start_day = serializers.DateField(read_only=True, format="%d %B")
     currency = serializers.CharField(read_only=True)
@@ -267,11 +279,10 @@ class UpcomingToursSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tour
         fields = ["id", "title", "slug", "price", "start_day", "currency", "duration"]
+        list_serializer_class = BatchListSerializer
 
     def to_representation(self, instance):
-        today = date.today()
-
-        price = instance.prices.filter(status=1).order_by("start").first()
+        price = self.load(FirstAvailablePriceLoader, instance.id)
 
         representation = super().to_representation(instance)
 
@@ -0,0 +1,133 @@
+import itertools
+import threading
+import uuid
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views import View
+
+from src.base.cache import LANGS, affected_langs, track_lang
+from src.base.compression import precompress
+from src.base.renderers import ORJSONRenderer
+from src.media.models import ImageDerivative
+
+from .models import Category, Tour
+from .serializers import CategoriesSerializer, CategoriesViewSerializer
+
+# Documents of this worker: lang -> {"version": ..., "<part>": bytes}
+_documents = {}
+
+_sequence = itertools.count()
+_built = threading.local()
+
+
+def _document_key(lang):
+    return f"catalog-snapshot:{lang}"
+
+
+def _version_key(lang):
+    return f"catalog-snapshot:{lang}:version"
+
+
+def build(lang):
+    """Serialize the navigation of ``lang`` once: categories with their tours, for both endpoints."""
+    categories = list(
+        Category.objects.filter(lang=lang).prefetch_related(
+            "derivatives", Prefetch("tours", queryset=Tour.objects.only("id", "title", "slug", "cat_id"))
+        )
+    )
+    renderer = ORJSONRenderer()
+    document = {
+        "version": uuid.uuid4().hex,
+        "categories": renderer.render(CategoriesSerializer(categories, many=True).data),
+        "rightbar": renderer.render(CategoriesViewSerializer(categories, many=True).data),
+    }
+    document["encoded"] = {part: precompress(document[part]) for part in ("categories", "rightbar")}
+    return document
+
+
+def rebuild(lang):
+    document = build(lang)
+    # The document goes in before its version, so a stamp never points at nothing
+    cache.set(_document_key(lang), document, None)
+    cache.set(_version_key(lang), document["version"], None)
+    _documents[lang] = document
+    return document
+
+
+def get_document(lang):
+    """
+    The current snapshot of ``lang``, from this worker's memory when its version is still current.
+
+    A request costs one read of the version stamp from the shared cache; the
+    document itself is fetched, or built, only after a change.
+    """
+    version = cache.get(_version_key(lang))
+    document = _documents.get(lang)
+    if document is not None and document["version"] == version:
+        return document
+
+    document = cache.get(_document_key(lang)) if version else None
+    if document is None or document["version"] != version:
+        return rebuild(lang)
+    _documents[lang] = document
+    return document
+
+
+class _Rebuild:
+    def __init__(self, lang):
+        self.lang = lang
+        self.scheduled = next(_sequence)
+
+    def __call__(self):
+        # Callbacks run after their transaction committed; one rebuild covers
+        # every change this thread scheduled before it
+        built = _built.__dict__.setdefault("langs", {})
+        if built.get(self.lang, -1) > self.scheduled:
+            return
+        built[self.lang] = next(_sequence)
+        rebuild(self.lang)
+
+
+def schedule_rebuild(langs):
+    # After commit, so no worker snapshots rows that may still roll back
+    for lang in set(langs) & set(LANGS):
+        transaction.on_commit(_Rebuild(lang))
+
+
+def _changed(sender, instance, **kwargs):
+    if sender is ImageDerivative and instance.content_type_id != ContentType.objects.get_for_model(Category).id:
+        return
+    schedule_rebuild(affected_langs(instance))
+
+
+for model in (Category, Tour, ImageDerivative):
+    post_save.connect(_changed, sender=model, dispatch_uid=f"catalog-snapshot:{model._meta.label}")
+    post_delete.connect(_changed, sender=model, dispatch_uid=f"catalog-snapshot:{model._meta.label}")
+    track_lang(model)
+
+
+class SnapshotView(View):
+    """Serve one part of the language's catalog snapshot as the JSON bytes it was stored with."""
+
+    part = None
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, lang_code, *args, **kwargs):
+        if lang_code not in LANGS:
+            return HttpResponse(b"[]", content_type="application/json")
+
+        document = get_document(lang_code)
+        etag = f'"{document["version"]}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(document[self.part], content_type="application/json")
+            response.encoded_variants = document.get("encoded", {}).get(self.part)
+        response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
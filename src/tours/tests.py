@@ -1,3 +1,346 @@
-from django.test import TestCase
+import gzip
+import json
+from io import StringIO
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date, parse_http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from nomad import urls_async
+from src.base.counters import ViewCounter, view_counter
+from src.base.renderers import ORJSONRenderer
+
+from src.base.testing import CommittedCatalogTestCase, EndpointBudgetTestCase, EndpointTestMixin
+from src.main.models import Articles
+from .loaders import FirstAvailablePriceLoader
+from .models import Category, Images, Prices, Tour, TourReviews
+from .serializers import TourDetailSerializer
+
+User = get_user_model()
+
+
+class TourEndpointTests(EndpointBudgetTestCase):
+    def test_category_tours(self):
+        response = self.assertBudget("/api/tour/list/category-0-en", queries=4)
+        self.assertEqual(len(response.json()["results"]), 3)
+
+    def test_tour_detail(self):
+        response = self.assertBudget("/api/tour/detail/tour-0-0-en", queries=8)
+        self.assertEqual(len(response.json()["prices"]), 3)
+
+    def test_tour_detail_not_modified(self):
+        response = self.client.get("/api/tour/detail/tour-0-0-en")
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        self.assertBudget("/api/tour/detail/tour-0-0-en", queries=1, status=304, HTTP_IF_NONE_MATCH=etag)
+        self.assertBudget(
+            "/api/tour/detail/tour-0-0-en", queries=1, status=304, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        Prices.objects.filter(tour__slug="tour-0-0-en").first().delete()
+        response = self.assertBudget("/api/tour/detail/tour-0-0-en", queries=8, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_tour_detail_gzip(self):
+        plain = self.client.get("/api/tour/detail/tour-0-0-en")
+        response = self.assertBudget("/api/tour/detail/tour-0-0-en", queries=8, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response["ETag"], f"W/{plain['ETag']}")
+        self.assertBudget(
+            "/api/tour/detail/tour-0-0-en", queries=1, status=304,
+            HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        tour = Tour.objects.prefetch_related("images__derivatives", "prices", "routes").get(slug="tour-0-0-en")
+        payload = {
+            "tour": TourDetailSerializer(tour).data,
+            "price": Decimal("12.50"),
+            "at": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            "day": date(2024, 5, 1),
+            "label": gettext_lazy("Тур"),
+            "ids": Tour.objects.filter(slug="tour-0-0-en").values_list("id", flat=True),
+            "text": "line\u2028break",
+            1: None,
+        }
+        self.assertEqual(ORJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_browsable_api_is_staff_only(self):
+        response = self.client.get("/api/tour/detail/tour-0-0-en", HTTP_ACCEPT="text/html")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(self.client.get("/api/tour/detail/tour-0-0-en?format=api").status_code, 404)
+
+        staff = User.objects.create_user("staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get("/api/tour/detail/tour-0-0-en", HTTP_ACCEPT="text/html")
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+
+    def test_dates(self):
+        self.assertBudget("/api/tour/dates", queries=0)
+
+    def test_guaranteed_tours(self):
+        response = self.assertBudget("/api/en/tour/guaranteed", queries=4)
+        self.assertEqual(len(response.json()["results"]), 4)
+
+    def test_guaranteed_tours_next_page(self):
+        first = self.client.get("/api/en/tour/guaranteed?page_size=2").json()
+        response = self.assertBudget(first["next"], queries=4)
+        self.assertFalse(response.json()["has_more"])
+
+    def test_guaranteed_tours_not_modified_per_page(self):
+        url = "/api/en/tour/guaranteed?page_size=2"
+        first = self.client.get(url)
+        # The page query and the validator over its rows, nothing serialized
+        self.assertBudget(url, queries=2, status=304, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        second = self.client.get(first.json()["next"])
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        tour = Tour.objects.get(pk=second.json()["results"][0]["id"])
+        tour.title = "Renamed"
+        tour.save()
+        self.assertBudget(url, queries=2, status=304, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertBudget(first.json()["next"], queries=4, HTTP_IF_NONE_MATCH=second["ETag"])
+
+    def test_last_modified_moves_at_midnight(self):
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+        for model in (Tour, Prices, Images):
+            model.objects.update(last_mod=yesterday - timedelta(days=30))
+        response = self.client.get("/api/en/tour/guaranteed")
+        midnight = datetime.combine(date.today(), time.min).astimezone()
+        self.assertEqual(parse_http_date(response["Last-Modified"]), int(midnight.timestamp()))
+        self.assertBudget(
+            "/api/en/tour/guaranteed", queries=4, HTTP_IF_MODIFIED_SINCE=http_date(yesterday.timestamp())
+        )
+
+    def test_guaranteed_tours_search(self):
+        self.assertBudget("/api/en/tour/guaranteed?search=trek", queries=4)
+
+    def test_slider(self):
+        self.assertBudget("/api/en/tour/slider", queries=2)
+
+    def test_main_page(self):
+        self.assertBudget("/api/en/tour/main", queries=5)
+
+    def test_categories(self):
+        response = self.assertBudget("/api/en/tour/categories", queries=3)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_rightbar(self):
+        self.assertBudget("/api/en/tour/rightbar", queries=3)
+
+    def test_catalog_snapshot_rebuilt_on_change(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "snapshot"}}
+        with override_settings(CACHES=locmem):
+            self.client.get("/api/en/tour/rightbar")
+            self.assertBudget("/api/en/tour/categories", queries=0)
+
+            tour = Tour.objects.get(slug="tour-0-0-en")
+            tour.title = "Renamed"
+            with self.captureOnCommitCallbacks(execute=True):
+                tour.save()
+
+            response = self.assertBudget("/api/en/tour/rightbar", queries=0)
+            titles = {t["slug"]: t["title"] for category in response.json() for t in category["tours"]}
+            self.assertEqual(titles["tour-0-0-en"], "Renamed")
+
+    def test_first_available_price_loader(self):
+        tours = list(Tour.objects.filter(lang="en"))
+        Prices.objects.filter(tour=tours[0]).update(status=2)
+        with self.assertNumQueries(1):
+            loaded = FirstAvailablePriceLoader().batch_load([tour.pk for tour in tours])
+        self.assertNotIn(tours[0].pk, loaded)
+        for tour in tours[1:]:
+            self.assertEqual(loaded[tour.pk], tour.prices.filter(status=1).order_by("start", "id").first())
+
+    def test_compressed_tour_image(self):
+        image = Images.objects.filter(tour__lang="en").first()
+        self.assertBudget(f"/api/compressed-tour-image/{image.pk}", queries=1)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT=True)
+    def test_compressed_tour_image_accel_redirect(self):
+        image = Images.objects.filter(tour__lang="en").first()
+        response = self.assertBudget(f"/api/compressed-tour-image/{image.pk}", queries=1)
+        self.assertRegex(response["X-Accel-Redirect"], r"^/internal/media/cache/\w\w/\w+/500x500-q50-\w+\.webp$")
+        self.assertEqual(response.content, b"")
+
+    def test_compressed_category_image(self):
+        category = Category.objects.filter(lang="en").first()
+        self.assertBudget(f"/api/compressed-tour-cat-image/{category.pk}", queries=1)
+
+    def test_create_review(self):
+        tour = Tour.objects.get(slug="tour-0-0-en")
+        data = {"tour": tour.pk, "rating": "5.0", "name": "Guest", "comment": "Great"}
+        response = self.assertBudget("/api/tour/review-create", queries=5, method="post", data=data)
+        self.assertTrue(response.json()["response"])
+
+    def test_tour_request(self):
+        tour = Tour.objects.get(slug="tour-0-0-en")
+        data = {
+            "tour": tour.pk,
+            "price": Prices.objects.filter(tour=tour).first().pk,
+            "first_name": "Guest",
+            "email": "guest@example.com",
+            "comment": "Two people",
+        }
+        response = self.assertBudget("/api/tour/request", queries=6, method="post", data=data)
+        self.assertTrue(response.json()["response"])
+
+
+class TourRatingTests(EndpointTestMixin, TestCase):
+    def setUp(self):
+        self.tour = Tour.objects.create(title="Rated", slug="rated", lang="en", description="", included="", excluded="")
+
+    def review(self, rating, status=1):
+        return TourReviews.objects.create(tour=self.tour, rating=Decimal(rating), status=status)
+
+    def assertRating(self, avg_rating, total_reviews, histogram):
+        tour = Tour.objects.get(pk=self.tour.pk)
+        self.assertEqual(tour.avg_rating, avg_rating if avg_rating is None else Decimal(avg_rating))
+        self.assertEqual(tour.total_reviews, total_reviews)
+        self.assertEqual(tour.rating_histogram, histogram)
+
+    def test_approved_reviews_are_counted(self):
+        self.review("5")
+        self.review("4")
+        self.review("1", status=2)
+        self.assertRating("4.5", 2, {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1})
+
+    def test_status_change_and_delete(self):
+        review = self.review("3", status=2)
+        self.review("5")
+        review.status = 1
+        review.save()
+        self.assertRating("4.0", 2, {"1": 0, "2": 0, "3": 1, "4": 0, "5": 1})
+
+        review.rating = Decimal("1")
+        review.save()
+        self.assertRating("3.0", 2, {"1": 1, "2": 0, "3": 0, "4": 0, "5": 1})
+
+        review.delete()
+        self.assertRating("5.0", 1, {"1": 0, "2": 0, "3": 0, "4": 0, "5": 1})
+
+    def test_admin_list_editable_status(self):
+        reviews = [self.review("4", status=2), self.review("2", status=1)]
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+        data = {"form-TOTAL_FORMS": "2", "form-INITIAL_FORMS": "2", "_save": "Save"}
+        for i, (review, status) in enumerate(zip(reviews, (1, 0))):
+            data.update({f"form-{i}-id": str(review.pk), f"form-{i}-status": str(status)})
+        response = self.client.post(reverse("admin:tours_tourreviews_changelist"), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertRating("4.0", 1, {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0})
+
+    def test_tour_save_keeps_aggregates_of_concurrent_reviews(self):
+        edited = Tour.objects.get(pk=self.tour.pk)
+        self.review("5")
+        edited.title = "Renamed"
+        edited.save()
+        self.assertEqual(Tour.objects.get(pk=self.tour.pk).title, "Renamed")
+        self.assertRating("5.0", 1, {"1": 0, "2": 0, "3": 0, "4": 0, "5": 1})
+
+    def test_rebuild_tour_ratings_fixes_drift(self):
+        self.review("4")
+        Tour.objects.filter(pk=self.tour.pk).update(total_reviews=7, rating_4=0, rating_2=3)
+
+        call_command("rebuild_tour_ratings", "--dry-run", stdout=StringIO())
+        self.assertEqual(Tour.objects.get(pk=self.tour.pk).total_reviews, 7)
+
+        out = StringIO()
+        call_command("rebuild_tour_ratings", stdout=out)
+        self.assertIn("1 tours rebuilt", out.getvalue())
+        self.assertRating("4.0", 1, {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0})
+
+
+class ViewCounterTests(EndpointTestMixin, TestCase):
+    def setUp(self):
+        self.tours = [
+            Tour.objects.create(title=f"Viewed {i}", slug=f"viewed-{i}", lang="en", description="", included="", excluded="")
+            for i in range(2)
+        ]
+        self.counter = ViewCounter()
+
+    def views(self):
+        return [Tour.objects.get(pk=tour.pk).views for tour in self.tours]
+
+    def test_flush_adds_buffered_views_in_one_update(self):
+        last_mod = Tour.objects.get(pk=self.tours[0].pk).last_mod
+        for tour, times in zip(self.tours, (3, 1)):
+            for _ in range(times):
+                self.counter.increment(Tour, tour.pk)
+        self.assertEqual(self.views(), [0, 0])
+
+        with self.assertNumQueries(1):
+            self.counter.flush()
+        self.assertEqual(self.views(), [3, 1])
+        self.assertEqual(self.counter.pending_size(), 0)
+        self.assertEqual(Tour.objects.get(pk=self.tours[0].pk).last_mod, last_mod)
+
+        # Adds to what is stored rather than overwriting it
+        Tour.objects.filter(pk=self.tours[1].pk).update(views=10)
+        self.counter.increment(Tour, self.tours[1].pk, amount=2)
+        self.counter.flush()
+        self.assertEqual(self.views(), [3, 12])
+
+    def test_full_buffer_flushes_on_increment(self):
+        with override_settings(VIEW_COUNTER_MAX_PENDING=3):
+            for _ in range(3):
+                self.counter.increment(Tour, self.tours[0].pk)
+        self.assertEqual(self.views(), [3, 0])
+
+    def test_failed_flush_keeps_views_for_the_next_one(self):
+        self.counter.increment(Tour, self.tours[0].pk, amount=2)
+        with mock.patch.object(Tour.objects, "filter", side_effect=DatabaseError), self.assertLogs("src.base.counters"):
+            self.counter.flush()
+        self.assertEqual(self.counter.pending_size(), 2)
+        self.counter.flush()
+        self.assertEqual(self.views(), [2, 0])
+
+    def test_tour_detail_counts_views(self):
+        self.client.get("/api/tour/detail/viewed-0")
+        self.client.get("/api/tour/detail/viewed-0")
+        view_counter.flush()
+        self.assertEqual(self.views(), [2, 0])
+
+
+class AsyncURLConfTests(CommittedCatalogTestCase):
+    # A real cache, so both URLconfs see the same catalog snapshot version
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "asgi"}}
+    )
+    async def test_async_urlconf_matches_sync_views(self):
+        # nomad/asgi.py resolves these before the sync URLconf: each must answer like the view it shadows
+        article = await Articles.objects.filter(lang="en").afirst()
+        slugs = {"tour-detail": "tour-0-0-en", "article-detail": article.slug}
+        urls = []
+        for pattern in urls_async.urlpatterns:
+            if not iscoroutinefunction(pattern.callback):
+                continue
+            if "slug" in pattern.pattern.converters:
+                values = [{"slug": slugs[pattern.name]}, {"slug": "missing"}]
+            else:
+                values = [{"lang_code": "en"}]
+            urls += [reverse(pattern.name, urlconf="nomad.urls_async", kwargs=kwargs) for kwargs in values]
+
+        for url in urls:
+            with self.subTest(url):
+                expected = await sync_to_async(self.client.get)(url)
+                with override_settings(ROOT_URLCONF="nomad.urls_async"):
+                    response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response["Content-Type"], expected["Content-Type"])
+                self.assertEqual(json.loads(response.content), json.loads(expected.content))
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+                self.assertEqual(response.get("Last-Modified"), expected.get("Last-Modified"))
+                if response.has_header("ETag"):
+                    with override_settings(ROOT_URLCONF="nomad.urls_async"):
+                        response = await self.async_client.get(url, headers={"If-None-Match": response["ETag"]})
+                    self.assertEqual(response.status_code, 304)
@@ -1,57 +1,49 @@
 from rest_framework.response import Response
-from rest_framework import generics, filters, views
-from django.db.models import Avg, Count, Q
+from rest_framework import generics, views
+from django.db import transaction
 from .models import *
 from .serializers import *
+from .filters import TourSearchFilter
 from .pagination import GuaranteedToursPagination
+from .snapshot import SnapshotView
 from src.tg_bot.bot import send_tour_review, tour_request
-from asyncio import run
+from src.base.cache import CachedViewMixin
+from src.base.conditional import ConditionalGetMixin
+from src.base.counters import view_counter
+from src.base.views import CompressedImageView
+from src.media.models import ImageDerivative
 
-from PIL import Image
-from io import BytesIO
-from django.http import FileResponse
-from rest_framework.generics import get_object_or_404
 
-
-class TourListAPIVIew(generics.ListAPIView):
+class TourListAPIVIew(ConditionalGetMixin, generics.ListAPIView):
+    conditional_relations = ("prices", "images")
     serializer_class = GuaranteedToursSerializer
     pagination_class = GuaranteedToursPagination
 
     def get_queryset(self):
-        tours = Tour.objects.filter(cat__slug=self.kwargs["slug"]).prefetch_related(
-            "prices",
-            "images",
-        )
-
-        tours = tours.annotate(
-            avg_rating=Avg("reviews__rating", filter=Q(reviews__status=1)),
-            total_reviews=Count("reviews", filter=Q(reviews__status=1)),
-        )
+        tours = Tour.objects.filter(cat__slug=self.kwargs["slug"])
         return tours.select_related("cat")
 
 
-class TourDetailAPIView(generics.RetrieveAPIView):
+class TourDetailAPIView(ConditionalGetMixin, generics.RetrieveAPIView):
+    conditional_relations = ("prices", "images", "routes", "reviews")
     serializer_class = TourDetailSerializer
     lookup_field = "slug"
 
     def get_queryset(self):
-        queryset = Tour.objects.prefetch_related("images", "prices", "routes").all()
-        tours = queryset.annotate(
-            avg_rating=Avg("reviews__rating", filter=Q(reviews__status=1)),
-            total_reviews=Count("reviews", filter=Q(reviews__status=1)),
-        )
-
-        return tours
+        return Tour.objects.prefetch_related("images__derivatives", "prices", "routes").all()
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
 
+        view_counter.increment(Tour, instance.pk)
         instance.views += 1
-        instance.save()
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def not_modified(self, validator):
+        view_counter.increment(Tour, validator["object_id"])
+
 
 class ReviewCreateAPIView(generics.CreateAPIView):
     serializer_class = ReviewSerializer
@@ -61,8 +53,9 @@ class ReviewCreateAPIView(generics.CreateAPIView):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
-            msg = run(send_tour_review(serializer.data))
+            with transaction.atomic():
+                serializer.save()
+                msg = send_tour_review(serializer.data)
             if msg:
                 return Response({"response": True})
             return Response({"response": False})
@@ -80,52 +73,38 @@ class DatesListAPIView(views.APIView):
         return Response(data)
 
 
-class GuaranteedToursAPIView(generics.ListAPIView):
-    search_fields = [
-        "cat__name",
-        "images__location",
-        "description",
-        "excluded",
-        "included",
-        "start_day",
-        "title",
-    ]
-    filter_backends = [filters.SearchFilter]
+class GuaranteedToursAPIView(ConditionalGetMixin, generics.ListAPIView):
+    conditional_relations = ("prices", "images")
+    filter_backends = [TourSearchFilter]
     serializer_class = GuaranteedToursSerializer
 
     pagination_class = GuaranteedToursPagination
 
     def get_queryset(self):
-        tours = Tour.objects.filter(type=1, lang=self.kwargs["lang_code"]).prefetch_related("prices", "images")
-
-        tours = tours.annotate(
-            avg_rating=Avg("reviews__rating", filter=Q(reviews__status=1)),
-            total_reviews=Count("reviews", filter=Q(reviews__status=1)),
-        )
-
+        tours = Tour.objects.filter(type=1, lang=self.kwargs["lang_code"])
         return tours.select_related("cat")
 
 
-class SliderAPIView(generics.ListAPIView):
+class SliderAPIView(CachedViewMixin, generics.ListAPIView):
+    cache_dependencies = (Slider, ImageDerivative)
     serializer_class = SliderSerializer
 
     def get_queryset(self):
-        queryset = Slider.objects.filter(is_active=True, lang=self.kwargs["lang_code"])
+        queryset = Slider.objects.filter(is_active=True, lang=self.kwargs["lang_code"]).prefetch_related("derivatives")
         sorted_queryset = sorted(queryset, key=lambda obj: obj.id)
         return sorted_queryset
 
 
-class MainPageAPIView(views.APIView):
+class MainPageAPIView(CachedViewMixin, views.APIView):
+    cache_dependencies = (Tour, Prices, Images)
+
     def get(self, request, lang_code, *args, **kwargs):
-        tours = Tour.objects.filter(top=True, lang=lang_code).prefetch_related("images", "prices")
-        upcoming_tours = (
-            Tour.objects.filter(type=1, lang=lang_code)
-            .prefetch_related("images", "prices")
-            .order_by("-id")[:4]
-        )
+        tours = Tour.objects.filter(top=True, lang=lang_code)
+        upcoming_tours = Tour.objects.filter(type=1, lang=lang_code).order_by("-id")[:4]
 
-        tours_serializer = MainToursSerializer(tours, many=True)
-        upcoming_tours_serializer = UpcomingToursSerializer(upcoming_tours, many=True)
+        context = {"request": request}
+        tours_serializer = MainToursSerializer(tours, many=True, context=context)
+        upcoming_tours_serializer = UpcomingToursSerializer(upcoming_tours, many=True, context=context)
 
         response_data = {
             "tours": tours_serializer.data,
@@ -135,11 +114,9 @@ class MainPageAPIView(views.APIView):
         return Response(response_data)
 
 
-class CategoriesAPIView(generics.ListAPIView):
-    serializer_class = CategoriesSerializer
+class CategoriesAPIView(SnapshotView):
+    part = "categories"
 
-    def get_queryset(self):
-        return Category.objects.filter(lang=self.kwargs["lang_code"])
 
 class TourRequestAPIView(generics.CreateAPIView):
     serializer_class = TourRequestSerializer
@@ -149,56 +126,27 @@ class TourRequestAPIView(generics.CreateAPIView):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
-            msg = run(tour_request(serializer.data))
+            with transaction.atomic():
+                serializer.save()
+                msg = tour_request(serializer.data)
             if msg:
                 return Response({"response": True})
             return Response({"response": False})
         return Response({"response": False, "errors": serializer.errors})
 
 
-class ToursView(generics.ListAPIView):
-    serializer_class = CategoriesViewSerializer
-    
-    def get_queryset(self):
-        return Category.objects.filter(lang=self.kwargs["lang_code"])
-
-
-
-class CompressedTourImageView(views.APIView):
-    def get(self, request, image_id):
-        image = get_object_or_404(Images, id=image_id)
-        compressed_image = self.compress_image(image.img)
-
-        response = FileResponse(compressed_image, content_type='image/webp')
-        return response
-
-    def compress_image(self, image):
-        img = Image.open(image.path)
-
-        img.thumbnail((500, 500))
-        output = BytesIO()
-        img.save(output, format='WEBP', quality=50)
-        output.seek(0)
-
-        return output
+class ToursView(SnapshotView):
+    part = "rightbar"
 
-    
-class CompressedTourCatImageView(views.APIView):
-    def get(self, request, cat_id):
-        obj = get_object_or_404(Category, id=cat_id)
-        compressed_image = self.compress_image(obj.img)
 
-        response = FileResponse(compressed_image, content_type='image/webp')
-        return response
 
-    def compress_image(self, image):
-        img = Image.open(image.path)
+class CompressedTourImageView(CompressedImageView):
+    model = Images
+    lookup_url_kwarg = "image_id"
+    size = (500, 500)
 
-        img.thumbnail((600, 600))
-        output = BytesIO()
-        img.save(output, format='WEBP', quality=50)
-        output.seek(0)
 
-        return output
-    
\ No newline at end of file
+class CompressedTourCatImageView(CompressedImageView):
+    model = Category
+    lookup_url_kwarg = "cat_id"
+    size = (600, 600)